@@ -1,19 +1,49 @@
 from __future__ import annotations
 
+import time
+
+_STARTUP_T0 = time.perf_counter()
+
 import os
 import re
+import io
+import gzip
 import json
-import smtplib
+import logging
+import shutil
+import base64
+import hashlib
+import mimetypes
 import sqlite3
+import threading
+import unicodedata
+import zlib
 from html import escape as html_escape
 from urllib.parse import quote
-from email.message import EmailMessage
-from dataclasses import dataclass
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from functools import wraps
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional
+
+from flask import Flask, Response, abort, flash, g, has_request_context, make_response, redirect, render_template, request, send_file, send_from_directory, session, stream_with_context, url_for
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.security import safe_join
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows (local dev): archive writers only lock within the process
+    fcntl = None
 
-from flask import Flask, abort, flash, redirect, render_template, request, send_from_directory, session, url_for
+if TYPE_CHECKING:  # smtplib/email load lazily, only when a notification is built or sent
+    import smtplib
+    from email.message import EmailMessage
+
+_STARTUP_T1 = time.perf_counter()
 
 APP_DIR = Path(__file__).resolve().parent
 
@@ -32,15 +62,6 @@ def parse_bool(v: str) -> bool:
     return s in {'1','true','yes','y','on','t'}
 
 
-def safe_ts(ts: str) -> str:
-    """Return a filesystem-safe timestamp string."""
-    s = (ts or '').strip()
-    # e.g. 2026-02-24T15:05:33 -> 20260224_150533
-    s = s.replace('T', '_').replace(':', '').replace('-', '')
-    s = re.sub(r'[^0-9_]+', '', s)
-    return s or str(int(datetime.utcnow().timestamp()))
-
-
 def mailto_link(to_email: str, subject: str = '', body: str = '') -> str:
     to_email = (to_email or '').strip()
     if not to_email:
@@ -66,11 +87,229 @@ def gmail_compose_link(to_email: str, subject: str = '', body: str = '') -> str:
     return base + '&' + '&'.join(q)
 
 
+# ----------------------------- Startup profile -----------------------------
+
+class StartupProfile:
+    """Wall-clock laps of the cold start: module imports, create_app() phases, first request.
+
+    ``lap(name)`` records the time since the previous lap, so phases need no nesting.
+    Per-module import times come from ``python -X importtime`` (scripts/bench_cold_start.py).
+    """
+
+    def __init__(self, started: float):
+        self.started = started
+        self._last = started
+        self.laps: List[tuple] = []  # (name, ms)
+        self.first_request: Optional[Dict] = None
+
+    def lap(self, name: str, at: Optional[float] = None) -> None:
+        now = time.perf_counter() if at is None else at
+        self.laps.append((name, round((now - self._last) * 1000, 2)))
+        self._last = now
+
+    def record_first_request(self, endpoint: str, started: float) -> None:
+        if self.first_request is not None:
+            return
+        now = time.perf_counter()
+        self.first_request = {
+            "endpoint": endpoint,
+            "ms": round((now - started) * 1000, 2),
+            "since_import_ms": round((now - self.started) * 1000, 2),
+        }
+
+    def report(self) -> Dict:
+        return {
+            "laps": [{"phase": name, "ms": ms} for name, ms in self.laps],
+            "ready_ms": round(sum(ms for _name, ms in self.laps), 2),
+            "first_request": self.first_request,
+        }
+
+
+STARTUP = StartupProfile(_STARTUP_T0)
+STARTUP.lap("imports", at=_STARTUP_T1)
+
+
+# ----------------------------- Lead archive -----------------------------
+
+class SegmentedArchive:
+    """Append-only archive split into date-sharded, size-rotated segments.
+
+    Layout: ``<root>/<YYYY-MM>/<prefix>_<YYYYMMDD>_<NNN><ext>``. The open segment is closed
+    when the next record would push it past ``max_bytes`` or when the day changes; closed
+    segments are compressed (``gzip``, or ``zstd`` when the zstandard package is installed).
+    Writers in different processes coordinate through ``<root>/.<prefix>.lock`` (flock),
+    which also guards ``<root>/.<prefix>.open`` — the name of the segment being written.
+    """
+
+    _name_re = re.compile(r"_(\d{8})_(\d+)\.")
+
+    def __init__(self, root: Path, prefix: str, ext: str, max_bytes: int, compress: str = "gzip"):
+        self.root = root
+        self.prefix = prefix
+        self.ext = ext
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.root / f".{self.prefix}.lock", "a+b") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _segment(self, day: str, n: int) -> str:
+        return f"{day[:4]}-{day[4:6]}/{self.prefix}_{day}_{n:03d}{self.ext}"
+
+    def append(self, data: bytes, when: datetime) -> tuple:
+        """Append ``data``; returns (segment, offset) of its first byte."""
+        day = when.strftime("%Y%m%d")
+        with self._locked():
+            state = self.root / f".{self.prefix}.open"
+            current = state.read_text(encoding="utf-8").strip() if state.exists() else ""
+            m = self._name_re.search(current)
+
+            target = current
+            if not m or m.group(1) != day:
+                target = self._segment(day, 1)
+            else:
+                try:
+                    size = (self.root / current).stat().st_size
+                except OSError:
+                    size = 0
+                if size and size + len(data) > self.max_bytes:
+                    target = self._segment(day, int(m.group(2)) + 1)
+
+            if target != current:
+                if current:
+                    self._close_segment(current)
+                state.write_text(target, encoding="utf-8")
+
+            path = self.root / target
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+                f.flush()
+            return target, offset
+
+    def _close_segment(self, segment: str) -> None:
+        src = self.root / segment
+        if not src.exists() or self.compress not in {"gzip", "zstd"}:
+            return
+        try:
+            if self.compress == "zstd":
+                import zstandard  # type: ignore
+
+                dst = src.with_name(src.name + ".zst")
+                tmp = dst.with_name(dst.name + ".tmp")
+                with src.open("rb") as fin, tmp.open("wb") as fout:
+                    zstandard.ZstdCompressor(level=10).copy_stream(fin, fout)
+            else:
+                dst = src.with_name(src.name + ".gz")
+                tmp = dst.with_name(dst.name + ".tmp")
+                with src.open("rb") as fin, gzip.open(tmp, "wb") as fout:
+                    shutil.copyfileobj(fin, fout)
+            os.replace(tmp, dst)
+            src.unlink()
+        except Exception:
+            # Leave the plain segment in place; it is still readable.
+            pass
+
+    def read(self, segment: str, offset: int, length: int) -> Optional[bytes]:
+        """Read one record back (from the plain or the compressed segment)."""
+        path = self.root / segment
+        try:
+            if path.exists():
+                with path.open("rb") as f:
+                    f.seek(offset)
+                    return f.read(length)
+            gz = path.with_name(path.name + ".gz")
+            if gz.exists():
+                with gzip.open(gz, "rb") as f:
+                    f.seek(offset)
+                    return f.read(length)
+            zst = path.with_name(path.name + ".zst")
+            if zst.exists():
+                import zstandard  # type: ignore
+
+                with zst.open("rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as f:
+                    f.seek(offset)
+                    return f.read(length)
+        except OSError:
+            return None
+        return None
+
+
+_ARCHIVES: Dict[tuple, SegmentedArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_archive(app: Flask, kind: str) -> Optional[SegmentedArchive]:
+    """The 'leads' (JSONL under LEADS_DIR) or 'mail' (mboxrd under MAIL_ARCHIVE_DIR) archive."""
+    if kind == "leads":
+        root = (app.config.get('LEADS_DIR') or '').strip()
+        if not root and (app.config.get('LEADS_JSONL_PATH') or '').strip():
+            # Legacy setting: keep the archive next to the old single JSONL file.
+            root = str(Path(app.config['LEADS_JSONL_PATH'].strip()).parent)
+        prefix, ext = "leads", ".jsonl"
+    else:
+        root = (app.config.get('MAIL_ARCHIVE_DIR') or '').strip()
+        prefix, ext = "mail", ".mbox"
+    if not root:
+        return None
+
+    compress = (app.config.get('ARCHIVE_COMPRESS') or '').strip().lower()
+    key = (kind, root, int(app.config.get('ARCHIVE_SEGMENT_BYTES') or 0), compress)
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(key)
+        if archive is None:
+            archive = _ARCHIVES[key] = SegmentedArchive(
+                Path(root), prefix, ext, max_bytes=key[2] or 8 * 1024 * 1024, compress=compress,
+            )
+        return archive
+
+
+def index_archived(app: Flask, kind: str, record_ids: List[int], segment: str, offset: int, length: int) -> None:
+    with db_write(app) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO archive_index (kind, record_id, segment, offset, length) VALUES (?, ?, ?, ?, ?)",
+            [(kind, rid, segment, offset, length) for rid in record_ids],
+        )
+
+
+def read_archived(app: Flask, kind: str, record_id: int) -> Optional[bytes]:
+    """Fetch one archived record via archive_index (no archive scan)."""
+    archive = get_archive(app, kind)
+    if archive is None:
+        return None
+    with get_db(app) as conn:
+        row = conn.execute(
+            "SELECT segment, offset, length FROM archive_index WHERE kind = ? AND record_id = ?", (kind, record_id)
+        ).fetchone()
+    if row is None:
+        return None
+    return archive.read(row["segment"], row["offset"], row["length"])
+
+
+def find_archived_mail(app: Flask, lead_id: int) -> Optional[bytes]:
+    """The archived notification (RFC 822 bytes) that covered this lead."""
+    data = read_archived(app, "mail", lead_id)
+    return re.sub(rb"(?m)^>(>*From )", rb"\1", data) if data else None
+
+
 def archive_lead_to_disk(app: Flask, *, lead_id: int, created_at: str, name: str, email: str, phone: str, message: str, source_path: str) -> None:
-    """Best-effort archiving of leads to JSON/JSONL on disk."""
-    leads_dir = (app.config.get('LEADS_DIR') or '').strip()
-    jsonl_path = (app.config.get('LEADS_JSONL_PATH') or '').strip()
-    if not leads_dir and not jsonl_path:
+    """Append the lead to the segmented JSONL archive and index its position.
+
+    Raises OSError when the archive cannot be written (the outbox retries the job).
+    """
+    archive = get_archive(app, "leads")
+    if archive is None:
         return
 
     payload = {
@@ -83,42 +322,23 @@ def archive_lead_to_disk(app: Flask, *, lead_id: int, created_at: str, name: str
         'source_path': source_path,
         'site': app.config.get('SITE_NAME', ''),
     }
+    data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
 
-    ts = safe_ts(created_at)
-
-    try:
-        if leads_dir:
-            Path(leads_dir).mkdir(parents=True, exist_ok=True)
-            out = Path(leads_dir) / f'lead_{lead_id}_{ts}.json'
-            out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
-    except Exception:
-        pass
+    segment, offset = archive.append(data + b'\n', datetime.utcnow())
+    index_archived(app, "leads", [lead_id], segment, offset, len(data))
 
-    try:
-        if jsonl_path:
-            p = Path(jsonl_path)
-            p.parent.mkdir(parents=True, exist_ok=True)
-            with p.open('a', encoding='utf-8') as f:
-                f.write(json.dumps(payload, ensure_ascii=False) + '\n')
-    except Exception:
-        pass
 
+# ----------------------------- E-mail -----------------------------
 
-def send_lead_email(app: Flask, *, lead_id: int, created_at: str, name: str, email: str, phone: str, message: str, source_path: str) -> bool:
-    """Send a lead notification e-mail via SMTP. Best-effort; returns True on success."""
+def mail_configured(app: Flask) -> bool:
     mail_to = (app.config.get('MAIL_TO') or '').strip()
     smtp_host = (app.config.get('SMTP_HOST') or '').strip()
-    smtp_user = (app.config.get('SMTP_USER') or '').strip()
-    smtp_pass = (app.config.get('SMTP_PASS') or '').strip()
-    smtp_from = (app.config.get('SMTP_FROM') or '').strip() or smtp_user
-    smtp_port = int(app.config.get('SMTP_PORT') or 587)
-    smtp_tls = bool(app.config.get('SMTP_TLS'))
+    smtp_from = (app.config.get('SMTP_FROM') or '').strip() or (app.config.get('SMTP_USER') or '').strip()
+    return bool(mail_to and smtp_host and smtp_from)
 
-    if not (mail_to and smtp_host and smtp_from):
-        return False
 
-    subject = f"Nowa wiadomość — {app.config.get('BRAND', app.config.get('SITE_NAME', ''))}"
-    body_lines = [
+def lead_email_lines(app: Flask, *, lead_id: int, created_at: str, name: str, email: str, phone: str, message: str, source_path: str) -> List[str]:
+    return [
         f"ID: {lead_id}",
         f"Data (UTC): {created_at}",
         f"Imię: {name}",
@@ -128,39 +348,170 @@ def send_lead_email(app: Flask, *, lead_id: int, created_at: str, name: str, ema
         '',
         'Wiadomość:',
         message,
-        '',
-        '---',
-        f"Serwis: {app.config.get('SITE_NAME','')} ({app.config.get('BRAND','')})",
     ]
 
-    msg = EmailMessage()
-    msg['Subject'] = subject
-    msg['From'] = smtp_from
-    msg['To'] = mail_to
-    msg.set_content('\n'.join(body_lines))
 
-    # Optional: archive .eml
+def archive_eml(app: Flask, msg: EmailMessage, lead_ids: List[int]) -> None:
+    """Best-effort copy of a delivered message to the segmented mail archive (mboxrd).
+
+    Called once per successful send, so retried jobs do not leave extra copies.
+    """
     try:
-        archive_dir = (app.config.get('MAIL_ARCHIVE_DIR') or '').strip()
-        if archive_dir:
-            Path(archive_dir).mkdir(parents=True, exist_ok=True)
-            eml = Path(archive_dir) / f'lead_{lead_id}_{safe_ts(created_at)}.eml'
-            eml.write_bytes(msg.as_bytes())
+        archive = get_archive(app, "mail")
+        if archive is None:
+            return
+        now = datetime.utcnow()
+        header = f"From x-estetik {now.strftime('%a %b %d %H:%M:%S %Y')}\n".encode('ascii')
+        body = re.sub(rb"(?m)^(>*From )", rb">\1", msg.as_bytes())
+        segment, offset = archive.append(header + body + b'\n\n', now)
+        index_archived(app, "mail", lead_ids, segment, offset + len(header), len(body))
     except Exception:
         pass
 
-    try:
-        with smtplib.SMTP(smtp_host, smtp_port, timeout=20) as server:
+
+def new_lead_message(app: Flask, subject: str, body_lines: List[str]) -> EmailMessage:
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = (app.config.get('SMTP_FROM') or '').strip() or (app.config.get('SMTP_USER') or '').strip()
+    msg['To'] = (app.config.get('MAIL_TO') or '').strip()
+    msg.set_content('\n'.join(body_lines + [
+        '',
+        '---',
+        f"Serwis: {app.config.get('SITE_NAME','')} ({app.config.get('BRAND','')})",
+    ]))
+    return msg
+
+
+def build_lead_email(app: Flask, *, lead_id: int, created_at: str, name: str, email: str, phone: str, message: str, source_path: str) -> Optional[EmailMessage]:
+    """Build the lead notification e-mail, or None when e-mail is not configured."""
+    if not mail_configured(app):
+        return None
+
+    subject = f"Nowa wiadomość — {app.config.get('BRAND', app.config.get('SITE_NAME', ''))}"
+    body_lines = lead_email_lines(app, lead_id=lead_id, created_at=created_at, name=name, email=email, phone=phone, message=message, source_path=source_path)
+    return new_lead_message(app, subject, body_lines)
+
+
+def build_lead_digest_email(app: Flask, leads: List[Dict]) -> Optional[EmailMessage]:
+    """Build one e-mail covering several leads (MAIL_DIGEST_SECONDS mode)."""
+    if not mail_configured(app) or not leads:
+        return None
+    if len(leads) == 1:
+        return build_lead_email(app, **lead_fields(leads[0]))
+
+    subject = f"Nowe wiadomości ({len(leads)}) — {app.config.get('BRAND', app.config.get('SITE_NAME', ''))}"
+    body_lines: List[str] = []
+    for i, lead in enumerate(leads, 1):
+        body_lines += [f"=== {i}/{len(leads)} ==="] + lead_email_lines(app, **lead_fields(lead)) + ['']
+    return new_lead_message(app, subject, body_lines)
+
+
+class SMTPSession:
+    """One reusable, authenticated SMTP connection (EHLO/STARTTLS/login done once).
+
+    The connection is reopened when the SMTP settings change, when it has been idle
+    for longer than SMTP_IDLE_TIMEOUT seconds, or when the server dropped it (one
+    transparent reconnect per message). Thread-safe; sends are serialized.
+    """
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._settings: Optional[tuple] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.sent = 0
+
+    @staticmethod
+    def settings(app: Flask) -> tuple:
+        return (
+            (app.config.get('SMTP_HOST') or '').strip(),
+            int(app.config.get('SMTP_PORT') or 587),
+            bool(app.config.get('SMTP_TLS')),
+            (app.config.get('SMTP_USER') or '').strip(),
+            (app.config.get('SMTP_PASS') or '').strip(),
+        )
+
+    def _connect(self, settings: tuple) -> smtplib.SMTP:
+        import smtplib
+
+        host, port, tls, user, password = settings
+        server = smtplib.SMTP(host, port, timeout=20)
+        try:
             server.ehlo()
-            if smtp_tls:
+            if tls:
                 server.starttls()
                 server.ehlo()
-            if smtp_user and smtp_pass:
-                server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-        return True
-    except Exception:
-        return False
+            if user and password:
+                server.login(user, password)
+        except Exception:
+            server.close()
+            raise
+        self.connects += 1
+        return server
+
+    def _drop(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def send(self, app: Flask, msg: EmailMessage) -> None:
+        """Send over the shared session. Raises on failure."""
+        import smtplib
+
+        settings = self.settings(app)
+        idle_timeout = float(app.config.get('SMTP_IDLE_TIMEOUT') or 0)
+        with self._lock:
+            if self._server is not None and (
+                settings != self._settings or time.monotonic() - self._last_used > idle_timeout
+            ):
+                self._drop()
+
+            for retry in (False, True):
+                if self._server is None:
+                    self._server = self._connect(settings)
+                    self._settings = settings
+                try:
+                    self._server.send_message(msg)
+                    break
+                except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                    self._drop()
+                    if retry:
+                        raise e
+                except Exception:
+                    # RSET keeps the session usable after a refused message.
+                    try:
+                        self._server.rset()
+                    except Exception:
+                        self._drop()
+                    raise
+
+            self._last_used = time.monotonic()
+            self.sent += 1
+
+    def close_if_idle(self, app: Flask) -> None:
+        idle_timeout = float(app.config.get('SMTP_IDLE_TIMEOUT') or 0)
+        with self._lock:
+            if self._server is not None and time.monotonic() - self._last_used > idle_timeout:
+                self._drop()
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+
+SMTP_SESSION = SMTPSession()
+
+
+def smtp_send_message(app: Flask, msg: EmailMessage) -> None:
+    """Send a message via the configured SMTP server (shared session). Raises on failure."""
+    SMTP_SESSION.send(app, msg)
 
 
 # ----------------------------- Data model -----------------------------
@@ -183,437 +534,325 @@ class Product:
     effects_url: str = ""
 
 
+PRODUCT_FIELDS = {f.name for f in fields(Product)}
 
 
-# Product photo overrides (drop files into static/photos/ with these base names)
-PRODUCT_PHOTO_BASE = {
-    'depimax': 'DepiMax',
-    'ems-formax': 'EMS FormaX',
-    'estetik-frax': 'Estetik Frax',
-    'lumera-estetik': 'Lumera Estetik',
-    'regen-lift': 'Regen Lift',
-    'x-blue-pen': 'X-Pen',
-    'x-boss': 'X-BOSS',
-    'x-contour-krio': 'X-Contour KRIO',
-    'x-derma': 'X-Derma',
-    'x-fraxel-premium': 'X-FRAXEL PRO',
-    'x-fraxel': 'X-FRAXEL',
-    'x-hair': 'X-Hair',
-    'x-levage-erbo': 'X-Levage Erbo',
-    'x-levage': 'X-Levage Pro',
-    'x-shape': 'X-Shape',
-    'x-v980': 'X-V980',
-    'chlodzenie-powietrzem-iii': 'Chłodzenie powietrzem III',
-    'kartridze-pen-16-igl': 'accessories_pen_16',
-    'kartridze-rf-vacuum': 'accessories_rf_vacuum',
-    'kartridze-frax': 'accessories_frax',
-    'kapsulki-oxy': 'accessories_oxy_capsules',
-}
 
-PRODUCTS: List[Product] = [
-    # --- LASERY (6) ---
-    Product(
-        slug="x-levage",
-        name="X‑Levage Pro (laser tulowy 1927 nm)",
-        category="lasers",
-        tag="Laser tulowy",
-        short="Długość fali 1927 nm — ukierunkowana praca w warstwach naskórka i skóry właściwej, wspiera odnowę skóry i redukcję przebarwień.",
-        bullets=[
-            "Długość fali: 1927 nm (laser tulowy).",
-            "Zastosowania: przebarwienia, fotostarzenie, poprawa struktury skóry.",
-            "Technologia wspiera stymulację kolagenu i regenerację.",
-        ],
-        price="105 000 zł",
-        pages=list(range(8, 16)),
-        effects_folder="x-levage",
-        effects_url="https://lasertulowyxlevage.pl/",
-    ),
-    Product(
-        slug="x-levage-erbo",
-        name="X‑Levage Erbo (1550 nm + 1927 nm)",
-        category="lasers",
-        tag="Laser frakcyjny nieablacyjny",
-        short="Podwójna długość fali: 1550 nm (erbowo‑szklany) + 1927 nm (tulowy). Resurfacing i przebudowa skóry z szybkim powrotem do formy.",
-        bullets=[
-            "Podwójna długość fali: 1550 nm + 1927 nm.",
-            "Nieablacyjny resurfacing — poprawa tekstury, kolorytu i elastyczności.",
-            "Zastosowania: zmarszczki, blizny potrądzikowe, rozstępy, fotostarzenie.",
-        ],
-        price="129 000 zł",
-        pages=list(range(2, 8)),
-        effects_folder="x-levage-erbo",
-        effects_url="https://lasertulowyxlevage.pl/",
-    ),
-    Product(
-        slug="depimax",
-        name="DepiMax™ (laser diodowy do epilacji)",
-        category="lasers",
-        tag="Laser diodowy 4‑falowy",
-        short="Czterofalowy system diodowy do epilacji (755 / 808 / 940 / 1064 nm) przeznaczony do pracy gabinetowej. Wielofalowość ułatwia dopasowanie podejścia zabiegowego do fototypu, obszaru i rodzaju włosa — z naciskiem na komfort oraz powtarzalność procedury.",
-        bullets=[
-            "4 długości fal w jednym urządzeniu — elastyczne dopasowanie do różnych typów owłosienia.",
-            "Końcówka z chłodzeniem kontaktowym wspiera komfort klienta podczas zabiegu.",
-            "Tryby pracy: punktowy oraz In‑Motion — wygodna praca na małych i dużych obszarach.",
-            "Proces gabinetowy: kwalifikacja, próba, zabieg właściwy, zalecenia pozabiegowe i plan wizyt.",
-        ],
-        price="55 000 zł",
-        pages=list(range(21, 28)),
-    ),
-    Product(
-        slug="x-hair",
-        name="X‑Hair (X‑HairOn)",
-        category="lasers",
-        tag="Laser diodowy do epilacji",
-        short="Diodowy laser do epilacji łączący skuteczne długości fal dla wysokiej skuteczności i bezpieczeństwa w zabiegach depilacji profesjonalnej.",
-        bullets=[
-            "Wielofalowe podejście — dopasowanie do różnych fototypów skóry.",
-            "Nowoczesny system chłodzenia (komfort zabiegowy).",
-            "Stabilna praca i wysoka wydajność w gabinecie.",
-        ],
-        price="65 000 zł",
-        pages=list(range(16, 21)),
-    ),
-    Product(
-        slug="x-fraxel",
-        name="X‑FRAXEL (laser frakcyjny CO₂)",
-        category="lasers",
-        tag="Laser ablacyjny CO₂",
-        short="Laser frakcyjny CO₂ o długości fali 10 600 nm. Resurfacing, odmładzanie skóry i redukcja blizn z kontrolowanym czasem gojenia.",
-        bullets=[
-            "Długość fali: 10 600 nm (CO₂).",
-            "Zastosowania: blizny, rozstępy, zmarszczki, resurfacing.",
-            "Tryby skanowania dla różnych obszarów zabiegowych.",
-        ],
-        price="35 000 zł",
-        rental="2 200 zł",
-        pages=list(range(34, 37)),
-    ),
-    Product(
-        slug="x-fraxel-premium",
-        name="X‑FRAXEL PRO (Premium)",
-        category="lasers",
-        tag="Laser ablacyjny CO₂ — PRO",
-        short="Wersja PRO z rozbudowanym skanowaniem i konfiguracją głowic. Zaprojektowana do intensywnej pracy w gabinecie i szerokiego spektrum wskazań.",
-        bullets=[
-            "Długość fali: 10 600 nm (CO₂).",
-            "7 trybów skanowania + regulacja gęstości mikrostref.",
-            "Zestaw głowic dopasowanych do różnych wskazań.",
-        ],
-        price="70 000 zł",
-        pages=list(range(28, 34)),
-        badge="Premium",
-    ),
-
-    # --- HI‑TECH ---
-    Product(
-        slug="x-v980",
-        name="X‑V980 (laser diodowy naczyniowy 980 nm)",
-        category="lasers",
-        tag="Laser diodowy 980 nm",
-        short="Laser diodowy 980 nm do pracy z naczynkami — precyzyjna aplikacja i szybkie rezultaty w zamykaniu zmian naczyniowych.",
-        bullets=[
-            "Długość fali: 980 nm.",
-            "Zastosowania: teleangiektazje, rubiniaki, wybrane naczyniaki.",
-            "Mała głowica do precyzyjnych obszarów.",
-        ],
-        price="22 500 zł",
-        rental="1 500 zł",
-        pages=list(range(37, 40)),
-    ),
-    Product(
-        slug="x-boss",
-        name="X‑BOSS (Q‑Switch) / X‑Boss Pro™",
-        category="lasers",
-        tag="Q‑Switch",
-        short="Laser Q‑Switch do usuwania tatuaży i przebarwień — konfiguracje wielowiązkowe oraz funkcje peelingu węglowego (w zależności od wersji).",
-        bullets=[
-            "Zastosowania: tatuaże, makijaż permanentny, przebarwienia.",
-            "Wersje z wieloma długościami fal (katalog).",
-            "System chłodzenia i ergonomiczne głowice.",
-        ],
-        price="27 000 zł",
-        rental="2 000 zł",
-        pages=[40, 41, 42],
-    ),
-    Product(
-        slug="lumera-estetik",
-        name="Luméra Estetik™ (DPL & NIR)",
-        category="hi-tech",
-        tag="DPL + NIR",
-        short="Urządzenie łączące DPL (pulsacyjne światło) i NIR — szeroki zakres terapii skóry i wsparcie protokołów zabiegowych.",
-        bullets=[
-            "Moduły DPL & NIR.",
-            "Rozwiązanie do terapii skóry i przebudowy.",
-            "Nowoczesny interfejs i szybka praca.",
-        ],
-        price="39 000 zł",
-        pages=list(range(43, 49)),
-    ),
-    Product(
-        slug="estetik-frax",
-        name="Estetik Frax™ (RF mikroigłowy)",
-        category="hi-tech",
-        tag="RF mikroigłowy",
-        short="Radiofrekwencja mikroigłowa — kontrolowana stymulacja skóry z możliwością personalizacji protokołów w zależności od obszaru i wskazania.",
-        bullets=[
-            "RF mikroigłowy — praca na strukturach skóry.",
-            "Personalizacja parametrów zabiegowych.",
-            "Zastosowania: tekstura skóry, blizny, odmładzanie (w zależności od protokołu).",
-        ],
-        price="25 000 zł",
-        rental="1 500 zł",
-        pages=list(range(49, 55)),
-    ),
-    Product(
-        slug="regen-lift",
-        name="Regen Lift (fala radiowa 448 kHz)",
-        category="hi-tech",
-        tag="RF 448 kHz",
-        short="Technologia fali radiowej 448 kHz — wsparcie terapii, zabiegów ujędrniających i protokołów regeneracyjnych.",
-        bullets=[
-            "Fala radiowa 448 kHz.",
-            "Zastosowania: ujędrnianie, regeneracja, wsparcie protokołów (katalog).",
-            "Tryby pracy dostosowane do potrzeb gabinetu.",
-        ],
-        price="49 000 zł",
-        rental="3 000 zł",
-        pages=list(range(55, 64)),
-    ),
-    Product(
-        slug="x-contour-krio",
-        name="X‑Contour KRIO",
-        category="hi-tech",
-        tag="Kriolipoliza bezpróżniowa + EMS",
-        short="Bezpróżniowa kriolipoliza połączona z elektroporacją i EMS. 8 padów może pracować niezależnie lub jednocześnie, co pozwala wykonywać zabiegi na dużych obszarach ciała.",
-        bullets=[
-            "Do 8 padów działających jednocześnie — duże obszary zabiegowe.",
-            "Komfort bez użycia próżni: bez krwiaków i obrzęków spowodowanych zasysaniem.",
-            "Parametry: EMS 4000 Hz, temperatura 45°C do −10°C, 3 rodzaje kształtu fali.",
-            "35 minut zabiegu: 30 min padów E‑CRYO + 5 min aplikatora O‑Shock.",
-            "Deklarowane rezultaty: do 6,8 cm redukcji obwodu; 40–60% redukcji tłuszczu na zabieg (wg katalogu).",
-        ],
-        price="55 000 zł",
-        rental="2600 zł",
-        pages=list(range(64, 69)),
-        badge="Body shaping",
-    ),
-    Product(
-        slug="x-shape",
-        name="X‑Shape",
-        category="hi-tech",
-        tag="Modelowanie sylwetki",
-        short="Urządzenie do zabiegów modelowania — podejście łączące technologie dla maksymalizacji efektu i komfortu.",
-        bullets=[
-            "Zabiegi ukierunkowane na modelowanie sylwetki.",
-            "Tryby i programy dobrane do protokołów gabinetowych.",
-            "Nowoczesny panel i ergonomia.",
-        ],
-        price="50 000 zł",
-        pages=list(range(69, 73)),
-    ),
-    Product(
-        slug="ems-formax",
-        name="EMS FormaX",
-        category="hi-tech",
-        tag="EMS / HIFEM",
-        short="Urządzenie EMS/HIFEM do intensywnej stymulacji mięśni — protokoły na różne obszary ciała i praca w trybie gabinetowym.",
-        bullets=[
-            "Technologia HIFEM/EMS (katalog).",
-            "Programy na różne partie ciała.",
-            "Wysoka moc i duży ekran sterowania.",
-        ],
-        price="55 000 zł",
-        pages=list(range(73, 82)),
-    ),
-    Product(
-        slug="x-derma",
-        name="X‑Derma (hydradermabrazja)",
-        category="hi-tech",
-        tag="Oczyszczanie + nawilżanie",
-        short="Platforma do oczyszczania, ekstrakcji i nawilżania (hydradermabrazja). Świetna jako zabieg samodzielny oraz jako przygotowanie skóry do dalszych terapii.",
-        bullets=[
-            "3‑etapowy proces: złuszczanie, oczyszczanie/ekstrakcja, nawilżanie.",
-            "Obrotowa końcówka 360° + ssanie dla skutecznej ekstrakcji.",
-            "Minimalny dyskomfort i szybki efekt zabiegowy.",
-        ],
-        price="15 000 zł",
-        pages=[91, 92, 93, 94, 97, 98, 99],
-    ),
-
-    Product(
-        slug="chlodzenie-powietrzem-iii",
-        name="Chłodziarka zabiegowa (Chłodzenie powietrzem III)",
-        category="hi-tech",
-        tag="Chłodzenie powietrzem −30°C",
-        short="System chłodzenia powietrzem do stosowania przed, w trakcie i po zabiegach laserowych, IPL i RF — redukuje ból, zaczerwienienie, obrzęk oraz ryzyko uszkodzeń termicznych.",
-        bullets=[
-            "Regulowany zakres temperatur: −4°C do −30°C.",
-            "Moc chłodzenia 1500 W + 8 biegów wentylatora.",
-            "Kompresor do pracy ciągłej, system samoodmrażania i samoodwadniania.",
-            "Przewód powietrzny 2,5 m (lekki przewód 200 g) + stabilny stojak.",
-            "Zastosowanie: depilacja laserowa, laser PICO, laser frakcyjny CO₂, zabiegi RF oraz czasowe znieczulenie przed iniekcjami.",
-        ],
-        price="19 900 zł",
-    ),
-
-    # --- AKCESORIA ---
-    Product(
-        slug="x-blue-pen",
-        name="X‑Pen (mikronakłuwanie)",
-        category="hi-tech",
-        tag="Micro‑needling",
-        short="Urządzenie do mikroigłowego nakłuwania z jednorazowymi kartridżami. Szybka praca i ergonomia dla gabinetu.",
-        bullets=[
-            "Do 1920 kanałów na sekundę (katalog).",
-            "Głębokość nakłuć do 2,5 mm.",
-            "System ograniczający ryzyko zakażeń krzyżowych (jednorazowe elementy).",
-        ],
-        price="5 500 zł",
-        rental="500 zł",
-        pages=list(range(82, 86)),
-    ),
-    Product(
-        slug="biopen-q2",
-        name="Bio Pen Q2",
-        category="hi-tech",
-        tag="Micro‑needling + EMS + LED",
-        short="Urządzenie łączące mikronakłuwanie, elektroporację EMS i światło LED. Wielofunkcyjne podejście do pielęgnacji i wsparcia regeneracji skóry.",
-        bullets=[
-            "3 technologie w jednym: micro‑needling + EMS + LED.",
-            "Wspiera teksturę skóry, jędrność i redukcję drobnych zmarszczek.",
-            "Kartridże jednorazowe — higiena i bezpieczeństwo.",
-        ],
-        price="800 zł",
-        rental="150 zł",
-        pages=list(range(86, 91)),
-        badge="Top value",
-    ),
-
-    # --- AKCESORIA (4) ---
-    Product(
-        slug="kartridze-pen-16-igl",
-        name="Kartridże do pena mikroigłowego 16 igłowe",
-        category="accessories",
-        tag="Akcesoria",
-        short="Jednorazowe kartridże 16-igłowe do pena mikroigłowego.",
-        bullets=[
-            "Cena: 35 zł - 1 sztuka.",
-        ],
-        price="35 zł - 1 sztuka",
-        pages=[],
-    ),
-    Product(
-        slug="kartridze-rf-vacuum",
-        name="Kartridże do RF mikroigłowy z vacuum",
-        category="accessories",
-        tag="Akcesoria",
-        short="Kartridże do RF mikroigłowego z systemem vacuum (różne warianty).",
-        bullets=[
-            "Kartridż nano - 59 zł",
-            "Kartridż 10 igłowy - 59 zł",
-            "Kartridż 25 igłowy - 59 zł",
-            "Kartridż 64 igłowy - 59 zł",
-        ],
-        price="59 zł",
-        pages=[],
-    ),
-    Product(
-        slug="kartridze-frax",
-        name="Kartridże do RF mikroigłowego ESTETIK FRAX",
-        category="accessories",
-        tag="Akcesoria",
-        short="Kartridże do RF mikroigłowego (ESTETIK FRAX) - różne końcówki.",
-        bullets=[
-            "Kartridż nano - 89 zł",
-            "Kartridż 10 pin - 89 zł",
-            "Kartridż 36 pin - 89 zł",
-            "Kartridż 64 pin - 89 zł",
-        ],
-        price="89 zł",
-        pages=[],
-    ),
-    Product(
-        slug="kapsulki-oxy",
-        name="Kapsułki do urządzeń typu Oxy",
-        category="accessories",
-        tag="Akcesoria",
-        short="Zestaw kapsułek do urządzeń typu Oxy.",
-        bullets=[
-            "Cena: 229 zł / opakowanie.",
-        ],
-        price="229 zł",
-        pages=[],
-    ),
-]
-
-PRODUCTS_BY_SLUG: Dict[str, Product] = {p.slug: p for p in PRODUCTS}
-
-# Order of products on the homepage (manual business order).
-# Any products not listed here fall back to alphabetical order after listed items.
-HOME_PAGE_ORDER: List[str] = [
-    "x-levage-erbo",
-    "x-levage-volum",
-    "x-levage-thermo",
-    "x-levage-thermo-vacuum",
-    "x-levage-hifu",
-    "x-levage-hifu-8d",
-    "x-levage-hifu-12d",
-    "x-levage-hifu-15d",
-    "x-levage-hifu-22d",
-    "x-levage-hifu-4d",
-    "emax-co2",
-    "depimax",
-    "eme-ipl",
-    "radiofrequency",
-    "hydrafacial",
-    "pico-laser",
-    "hifu-vaginal",
-    "hifu-lipoline",
-    "ultrasonic-hifu",
-    "shockwave",
-    "cryolipolysis",
-    # --- HI-TECH ---
-    "lumera-estetik",
-    "estetik-frax",
-    "biopen-q2",
-    "chlodzenie-powietrzem-iii",
-    # --- AKCESORIA ---
-    "kartridze-pen-16-igl",
-    "kartridze-rf-vacuum",
-    "kartridze-frax",
-    "kapsulki-oxy",
-]
-
-HOME_PAGE_ORDER_MAP: Dict[str, int] = {slug: i for i, slug in enumerate(HOME_PAGE_ORDER)}
-
-
-CATEGORY_META = {
-    "lasers": {
-        "label": "Lasery",
-        "route": "lasers",
-        "description": "Wszystkie lasery . Kliknij urządzenie, aby otworzyć kartę z galerią stron katalogowych.",
-        "grid_classes": "grid-cols-2 lg:grid-cols-3 gap-2 sm:gap-4",
-        "img_class": "h-44 sm:h-60",
-        "section_px": "px-0 sm:px-6 lg:px-10",
-        "card_round": "rounded-none sm:rounded-3xl",
-    },
-    "hi-tech": {
-        "label": "Urządzenia Hi‑Tech",
-        "route": "hi_tech",
-        "description": "Pozostałe urządzenia  — RF, DPL/NIR, EMS, hydradermabrazja i inne technologie.",
-    },
-    "accessories": {
-        "label": "Akcesoria",
-        "route": "accessories",
-        "description": "Akcesoria i urządzenia uzupełniające ofertę gabinetu.",
-    },
-}
+
+@dataclass(frozen=True)
+class Catalog:
+    """Read-only indexes over the product list, built by build_catalog().
+
+    ``by_category`` keeps the file order (category listing pages); ``home_by_category``
+    follows ``home_order``, unlisted products after it by name. ``version`` changes
+    whenever the catalog is reloaded, so view-model and page caches keyed on it refresh.
+    """
+
+    version: int
+    products: tuple
+    by_slug: Mapping[str, Product]
+    by_category: Mapping[str, tuple]
+    home_by_category: Mapping[str, tuple]
+    category_meta: Mapping[str, Mapping]
+    photo_base: Mapping[str, str]  # slug -> photo override base name in static/photos/
+    prices: Mapping[str, tuple]  # slug -> (price, rental) in grosze, None when not given
+    price_index: Mapping[str, "PriceIndex"]
+
+    def category(self, category: str) -> tuple:
+        return self.by_category.get(category, ())
+
+    def home(self, category: str) -> tuple:
+        return self.home_by_category.get(category, ())
+
+    @property
+    def has_accessories(self) -> bool:
+        return bool(self.category("accessories"))
+
+
+_PRICE_RE = re.compile(r"^\s*(\d{1,3}(?:[ \u00A0\u202F]\d{3})+|\d+)(?:[,.](\d{1,2}))?\s*zł(?:\s*(?:[-–—/].*)?)?$", re.IGNORECASE)
+
+
+def parse_price_grosze(text: str) -> Optional[int]:
+    """"105 000 zł" -> 10500000, "35 zł - 1 sztuka" -> 3500, "" -> None; ValueError otherwise."""
+    if not (text or "").strip():
+        return None
+    m = _PRICE_RE.match(text)
+    if not m:
+        raise ValueError(f"unrecognised price {text!r} (expected e.g. '105 000 zł')")
+    whole = int(re.sub(r"\D", "", m.group(1)))
+    return whole * 100 + int((m.group(2) or "0").ljust(2, "0"))
+
+
+@dataclass(frozen=True)
+class PriceIndex:
+    """Price orderings of one category as index arrays into Catalog.by_category[category].
+
+    ``price_asc`` lists the priced positions cheapest first and ``price_keys`` their prices,
+    so a price range is two bisects; ``unpriced`` always go last. ``rental`` holds the
+    positions with a rental price, cheapest rental first.
+    """
+
+    price_asc: tuple
+    price_keys: tuple
+    unpriced: tuple
+    rental: tuple
+
+
+LISTING_SORTS = ("", "price_asc", "price_desc", "rental")
+
+
+def build_price_index(products: tuple, prices: Mapping[str, tuple]) -> PriceIndex:
+    priced = sorted((prices[p.slug][0], i) for i, p in enumerate(products) if prices[p.slug][0] is not None)
+    rented = sorted((prices[p.slug][1], i) for i, p in enumerate(products) if prices[p.slug][1] is not None)
+    return PriceIndex(
+        price_asc=tuple(i for _price, i in priced),
+        price_keys=tuple(price for price, _i in priced),
+        unpriced=tuple(i for i, p in enumerate(products) if prices[p.slug][0] is None),
+        rental=tuple(i for _rent, i in rented),
+    )
+
+
+def select_listing(catalog: Catalog, category: str, sort: str = "", price_min: Optional[int] = None,
+                   price_max: Optional[int] = None, rental_only: bool = False) -> tuple:
+    """Products of a category filtered by price range (grosze, inclusive) / rental and sorted.
+
+    Reads the precomputed PriceIndex; a price range excludes products without a price.
+    """
+    products = catalog.category(category)
+    if not sort and price_min is None and price_max is None and not rental_only:
+        return products
+    index = catalog.price_index.get(category)
+    if index is None:
+        return ()
+
+    if price_min is None and price_max is None:
+        candidates = index.price_asc + index.unpriced
+    else:
+        lo = 0 if price_min is None else bisect_left(index.price_keys, price_min)
+        hi = len(index.price_keys) if price_max is None else bisect_right(index.price_keys, price_max)
+        candidates = index.price_asc[lo:hi]
+    if rental_only:
+        rentable = set(index.rental)
+        candidates = tuple(i for i in candidates if i in rentable)
+
+    if sort == "price_asc":
+        order = candidates
+    elif sort == "price_desc":
+        unpriced = set(index.unpriced)
+        order = tuple(reversed([i for i in candidates if i not in unpriced])) + tuple(i for i in candidates if i in unpriced)
+    elif sort == "rental":
+        wanted = set(candidates)
+        rentable = set(index.rental)
+        order = tuple(i for i in index.rental if i in wanted) + tuple(sorted(i for i in wanted if i not in rentable))
+    else:
+        order = tuple(sorted(candidates))
+    return tuple(products[i] for i in order)
+
+
+class CatalogError(ValueError):
+    """The catalog file is missing, is not valid JSON or does not match the schema."""
+
+
+_SLUG_RE = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+_PRODUCT_REQUIRED = ("slug", "name", "category", "tag", "short", "bullets")
+# Endpoints a category may link back to (to_view() passes the route to url_for()).
+CATEGORY_ROUTES = ("lasers", "hi_tech", "accessories", "index")
+_PRODUCT_STR_FIELDS = ("slug", "name", "category", "tag", "short", "price", "rental", "badge", "effects_folder", "effects_url")
+
+
+def validate_catalog_data(data) -> List[str]:
+    """Schema errors of a parsed catalog file (empty list when valid)."""
+    if not isinstance(data, dict):
+        return ["top level: expected an object"]
+    errors = [f"top level: unknown key {k!r}" for k in data if k not in {"categories", "home_order", "photo_base", "products"}]
+
+    categories = data.get("categories")
+    if not isinstance(categories, dict) or not categories:
+        errors.append("categories: expected a non-empty object")
+        categories = {}
+    for name, meta in categories.items():
+        if not isinstance(meta, dict) or not all(isinstance(meta.get(k), str) for k in ("label", "route")):
+            errors.append(f"categories.{name}: expected an object with string 'label' and 'route'")
+        elif not all(isinstance(v, str) for v in meta.values()):
+            errors.append(f"categories.{name}: values must be strings")
+        elif meta["route"] not in CATEGORY_ROUTES:
+            errors.append(f"categories.{name}.route: unknown endpoint {meta['route']!r} (expected one of {', '.join(CATEGORY_ROUTES)})")
+
+    home_order = data.get("home_order", [])
+    if not isinstance(home_order, list) or not all(isinstance(v, str) for v in home_order):
+        errors.append("home_order: expected a list of slugs")
+
+    products = data.get("products")
+    if not isinstance(products, list) or not products:
+        errors.append("products: expected a non-empty list")
+        products = []
+    slugs: set = set()
+    for i, prod in enumerate(products):
+        where = f"products[{i}]"
+        if not isinstance(prod, dict):
+            errors.append(f"{where}: expected an object")
+            continue
+        where = f"products[{i}] ({prod.get('slug', '?')})"
+        errors += [f"{where}: missing {k!r}" for k in _PRODUCT_REQUIRED if k not in prod]
+        errors += [f"{where}: unknown key {k!r}" for k in prod if k not in PRODUCT_FIELDS]
+        errors += [f"{where}.{k}: expected a string" for k in _PRODUCT_STR_FIELDS if k in prod and not isinstance(prod[k], str)]
+        bullets = prod.get("bullets", [])
+        if not isinstance(bullets, list) or not all(isinstance(b, str) for b in bullets):
+            errors.append(f"{where}.bullets: expected a list of strings")
+        for k in ("price", "rental"):
+            if isinstance(prod.get(k), str):
+                try:
+                    parse_price_grosze(prod[k])
+                except ValueError as e:
+                    errors.append(f"{where}.{k}: {e}")
+        pages = prod.get("pages")
+        if pages is not None and (not isinstance(pages, list) or not all(isinstance(n, int) and not isinstance(n, bool) for n in pages)):
+            errors.append(f"{where}.pages: expected a list of integers or null")
+        slug = prod.get("slug")
+        if isinstance(slug, str):
+            if not _SLUG_RE.match(slug):
+                errors.append(f"{where}.slug: expected lowercase letters, digits and dashes")
+            elif slug in slugs:
+                errors.append(f"{where}.slug: duplicate")
+            slugs.add(slug)
+        if isinstance(prod.get("category"), str) and prod["category"] not in categories:
+            errors.append(f"{where}.category: unknown category {prod['category']!r}")
+
+    photo_base = data.get("photo_base", {})
+    if not isinstance(photo_base, dict) or not all(isinstance(v, str) for v in photo_base.values()):
+        errors.append("photo_base: expected an object of slug -> base name")
+    else:
+        errors += [f"photo_base.{slug}: unknown product" for slug in photo_base if slug not in slugs]
+    return errors
+
+
+def build_catalog(data: Dict, version: int) -> Catalog:
+    """Catalog from validated catalog-file data (see validate_catalog_data())."""
+    products = [
+        Product(**{**prod, "bullets": list(prod["bullets"]), "pages": None if prod.get("pages") is None else list(prod["pages"])})
+        for prod in data["products"]
+    ]
+    rank = {slug: i for i, slug in enumerate(data.get("home_order", []))}
+    by_category: Dict[str, list] = {}
+    for p in products:
+        by_category.setdefault(p.category, []).append(p)
+
+    def home_key(p: Product):
+        # Explicit homepage order first; then fall back to name.
+        return (rank.get(p.slug, 10**9), p.name.lower())
+
+    prices = {p.slug: (parse_price_grosze(p.price), parse_price_grosze(p.rental)) for p in products}
+    return Catalog(
+        version=version,
+        products=tuple(products),
+        by_slug=MappingProxyType({p.slug: p for p in products}),
+        by_category=MappingProxyType({c: tuple(ps) for c, ps in by_category.items()}),
+        home_by_category=MappingProxyType({c: tuple(sorted(ps, key=home_key)) for c, ps in by_category.items()}),
+        category_meta=MappingProxyType({c: MappingProxyType(dict(m)) for c, m in data["categories"].items()}),
+        photo_base=MappingProxyType(dict(data.get("photo_base", {}))),
+        prices=MappingProxyType(prices),
+        price_index=MappingProxyType({c: build_price_index(tuple(ps), prices) for c, ps in by_category.items()}),
+    )
+
+
+def load_catalog_file(path: Path, version: int) -> Catalog:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise CatalogError(f"{path}: {e}") from e
+    errors = validate_catalog_data(data)
+    if errors:
+        raise CatalogError(f"{path}: " + "; ".join(errors))
+    return build_catalog(data, version)
+
+
+class CatalogStore:
+    """The current Catalog, loaded from catalog.json and hot-reloaded when the file changes.
+
+    The file's (mtime, size) is checked at most once per ``check_interval`` seconds
+    (0 = every lookup, negative = never). A changed file is parsed and validated off to the
+    side and then swapped in with a single assignment, so readers always see a complete
+    catalog; an invalid edit is logged and the previous catalog stays in place. Every swap
+    gets a higher version, which invalidates the view-model and page caches.
+    """
+
+    def __init__(self, path: Path, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.last_error = ""
+        self._catalog: Optional[Catalog] = None
+        self._stat: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _file_stat(self) -> Optional[tuple]:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> Catalog:
+        """(Re)load the file now; raises CatalogError when it is missing or invalid."""
+        with self._lock:
+            stat = self._file_stat()
+            version = self._catalog.version + 1 if self._catalog else 1
+            catalog = load_catalog_file(self.path, version)
+            self._catalog, self._stat = catalog, stat
+            self._checked_at = time.monotonic()
+            self.last_error = ""
+            return catalog
+
+    def current(self) -> Catalog:
+        catalog = self._catalog
+        if catalog is None:
+            return self.load()
+        if self.check_interval < 0 or time.monotonic() - self._checked_at < self.check_interval:
+            return catalog
+        self._checked_at = time.monotonic()
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return catalog
+        try:
+            catalog = self.load()
+            self.reloads += 1
+        except CatalogError as e:
+            self._stat = stat  # do not re-parse the same broken file on every check
+            self.last_error = str(e)
+            logging.getLogger(__name__).error("catalog reload failed, keeping version %s: %s", catalog.version, e)
+        return catalog
+
+    def stats(self) -> Dict:
+        catalog = self._catalog
+        return {
+            "path": str(self.path),
+            "version": catalog.version if catalog else 0,
+            "products": len(catalog.products) if catalog else 0,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+CATALOG_STORE = CatalogStore(APP_DIR / "catalog.json")
+
+
+def get_catalog() -> Catalog:
+    """The catalog for this request: pinned on first use, so a reload mid-request is not seen."""
+    if not has_request_context():
+        return CATALOG_STORE.current()
+    catalog = g.get("catalog")
+    if catalog is None:
+        catalog = g.catalog = CATALOG_STORE.current()
+    return catalog
 
 
 # ----------------------------- App factory -----------------------------
 
 def create_app() -> Flask:
+    STARTUP.lap("module")
     app = Flask(__name__)
+    app.json = FrozenJSONProvider(app)
 
     # Storage base (Render persistent disk is commonly mounted at /var/data).
     data_dir_raw = get_env("DATA_DIR", "")
@@ -622,10 +861,13 @@ def create_app() -> Flask:
     default_leads_dir = str(data_base / "leads")
     default_leads_jsonl = str(data_base / "leads.jsonl")
     default_mail_archive_dir = str(data_base / "mail_archive")
+    default_pdf_cache_dir = str(data_base / "pdf_cache")
+    default_remote_image_dir = str(data_base / "remote_images")
 
     app.config.update(
         SECRET_KEY=get_env("SECRET_KEY", "dev-secret-key-change-me"),
-        STATIC_VERSION=get_env("STATIC_VERSION", str(int(datetime.utcnow().timestamp()))),
+        # Defaults to a hash of site.css/site.js/site_extra.js, so it survives restarts.
+        STATIC_VERSION=get_env("STATIC_VERSION", "") or STATIC_FINGERPRINTS.bundle_digest(),
         SITE_NAME=get_env("SITE_NAME", "X‑Estetik"),
         BRAND=get_env("BRAND", "X‑Estetik"),
 
@@ -652,13 +894,20 @@ def create_app() -> Flask:
         FACEBOOK_TULOWY_ERBO_HANDLE=get_env("FACEBOOK_TULOWY_ERBO_HANDLE", "laser tulowy + erbowo szklany"),
         TIKTOK_URL=get_env("TIKTOK_URL", "https://www.tiktok.com/"),
         TIKTOK_HANDLE=get_env("TIKTOK_HANDLE", "TikTok"),
+        # QR images for social links: png (needs Pillow) or svg.
+        QR_FORMAT=get_env("QR_FORMAT", "png").lower(),
         DATA_DIR=data_dir_raw,
         DB_PATH=get_env("DB_PATH", default_db_path),
+        DB_BUSY_TIMEOUT_MS=int(get_env("DB_BUSY_TIMEOUT_MS", "5000") or "5000"),
+        DB_STATEMENT_CACHE=int(get_env("DB_STATEMENT_CACHE", "256") or "256"),
 
         # Leads archive (optional)
         LEADS_DIR=get_env("LEADS_DIR", default_leads_dir),
         LEADS_JSONL_PATH=get_env("LEADS_JSONL_PATH", default_leads_jsonl),
         MAIL_ARCHIVE_DIR=get_env("MAIL_ARCHIVE_DIR", default_mail_archive_dir),
+        # Archive segments rotate at this size; closed segments are compressed (gzip | zstd | none).
+        ARCHIVE_SEGMENT_BYTES=int(get_env("ARCHIVE_SEGMENT_BYTES", str(8 * 1024 * 1024)) or "0"),
+        ARCHIVE_COMPRESS=get_env("ARCHIVE_COMPRESS", "gzip"),
 
         # Admin (optional)
         ADMIN_USER=get_env("ADMIN_USER", "admin"),
@@ -672,6 +921,10 @@ def create_app() -> Flask:
         SMTP_USER=get_env("SMTP_USER", ""),
         SMTP_PASS=get_env("SMTP_PASS", ""),
         SMTP_FROM=get_env("SMTP_FROM", ""),
+        # Keep the authenticated SMTP session open this long between messages (seconds).
+        SMTP_IDLE_TIMEOUT=float(get_env("SMTP_IDLE_TIMEOUT", "60") or "60"),
+        # >0: merge leads arriving within this many seconds into one notification e-mail.
+        MAIL_DIGEST_SECONDS=float(get_env("MAIL_DIGEST_SECONDS", "0") or "0"),
 
         # R2 public bucket base URL for /filmy showcase clips.
         # Example: https://<pub-...>.r2.dev
@@ -712,6 +965,12 @@ def create_app() -> Flask:
                 "fe03088b-bd8a-44e2-90a4-0f145d955655.png",
             ]),
         ),
+
+        # Local mirror of the R2 portfolio images (/img/strony-www/...): originals are fetched
+        # once, thumbnails rendered from them; least recently used files go past the limit.
+        REMOTE_IMAGE_CACHE_DIR=get_env("REMOTE_IMAGE_CACHE_DIR", default_remote_image_dir),
+        REMOTE_IMAGE_CACHE_MAX_MB=int(get_env("REMOTE_IMAGE_CACHE_MAX_MB", "200") or "200"),
+        REMOTE_IMAGE_TIMEOUT=float(get_env("REMOTE_IMAGE_TIMEOUT", "10") or "10"),
 # Optional external override for the HERO video ("video 1").
         # If set, the site will prefer this URL for "video 1" (e.g. Cloudflare R2 public URL).
         # You can pass either:
@@ -721,6 +980,31 @@ def create_app() -> Flask:
             "VIDEO_1_URL",
             "https://pub-6b9f87ec02e04dc88c5b18144e88754a.r2.dev/video%201.mp4",
         ),
+
+        # Assembled catalog / per-product PDFs (content-addressed, safe to delete).
+        PDF_CACHE_DIR=get_env("PDF_CACHE_DIR", default_pdf_cache_dir),
+
+        # Product catalog file; re-checked for changes every CATALOG_CHECK_INTERVAL seconds (negative = never).
+        CATALOG_PATH=get_env("CATALOG_PATH", str(APP_DIR / "catalog.json")),
+        CATALOG_CHECK_INTERVAL=float(get_env("CATALOG_CHECK_INTERVAL", "2") or "2"),
+
+        # How often (seconds) the static asset index re-checks directory mtimes.
+        # 0 = on every lookup, negative = never (index is built once at startup).
+        ASSET_INDEX_CHECK_INTERVAL=float(get_env("ASSET_INDEX_CHECK_INTERVAL", "2") or "2"),
+
+        # Lead outbox (archive + e-mail delivered by a background thread per worker).
+        OUTBOX_WORKER=parse_bool(get_env("OUTBOX_WORKER", "1")),
+        OUTBOX_POLL_INTERVAL=float(get_env("OUTBOX_POLL_INTERVAL", "15") or "15"),
+        OUTBOX_MAX_ATTEMPTS=int(get_env("OUTBOX_MAX_ATTEMPTS", "8") or "8"),
+        OUTBOX_RETRY_BASE=float(get_env("OUTBOX_RETRY_BASE", "30") or "30"),
+        OUTBOX_RETRY_MAX=float(get_env("OUTBOX_RETRY_MAX", "3600") or "3600"),
+
+        # Rendered-page LRU cache (number of pages kept per worker; 0 disables).
+        PAGE_CACHE_SIZE=int(get_env("PAGE_CACHE_SIZE", "128") or "128"),
+
+        # Gzip for HTML/JSON responses: level 1-9 (0 disables), bodies below COMPRESS_MIN_BYTES are sent as-is.
+        COMPRESS_LEVEL=int(get_env("COMPRESS_LEVEL", "6") or "0"),
+        COMPRESS_MIN_BYTES=int(get_env("COMPRESS_MIN_BYTES", "1024") or "0"),
     )
 
     def build_r2_showcase() -> list[dict]:
@@ -768,9 +1052,23 @@ def create_app() -> Flask:
 
         return showcase
 
-    (APP_DIR / "instance").mkdir(parents=True, exist_ok=True)
-    init_db(app)
-    ensure_qr_codes(app)
+    # Fail fast on a missing or invalid catalog; later edits are hot-reloaded.
+    CATALOG_STORE.path = Path(app.config["CATALOG_PATH"])
+    CATALOG_STORE.check_interval = app.config["CATALOG_CHECK_INTERVAL"]
+    CATALOG_STORE.load()
+
+    REMOTE_IMAGES.root = Path(app.config["REMOTE_IMAGE_CACHE_DIR"])
+    REMOTE_IMAGES.max_bytes = app.config["REMOTE_IMAGE_CACHE_MAX_MB"] * 1024 * 1024
+    REMOTE_IMAGES.timeout = app.config["REMOTE_IMAGE_TIMEOUT"]
+    STARTUP.lap("create_app: config")
+    bootstrap(app)
+    STARTUP.lap("create_app: bootstrap")
+
+    # Scan static/ once; afterwards only directory mtimes are re-checked (throttled).
+    ASSET_INDEX.check_interval = app.config["ASSET_INDEX_CHECK_INTERVAL"]
+    ASSET_INDEX.refresh(force=True)
+    STATIC_FINGERPRINTS.check_interval = app.config["ASSET_INDEX_CHECK_INTERVAL"]
+    STARTUP.lap("create_app: static index")
 
     def extract_drive_file_id(url_or_id: str) -> str:
         """Extract Google Drive file id from a share URL, or return the id as-is."""
@@ -804,38 +1102,134 @@ def create_app() -> Flask:
     def is_external_url(url: str) -> bool:
         return bool(url) and bool(re.match(r"^https?://", url.strip(), flags=re.IGNORECASE))
 
-    @app.context_processor
-    def inject_globals():
-        def resolve_video_urls(video_base: str) -> list[str]:
-            """Return a list of candidate URLs for a given video base name."""
-            base = (video_base or "").strip()
-            if not base:
-                return []
+    PAGE_CACHE.max_entries = app.config["PAGE_CACHE_SIZE"]
+    COMPRESSED_PAGES.max_entries = app.config["PAGE_CACHE_SIZE"]
+
+    def content_version() -> tuple:
+        """Everything a cached page depends on besides its route and args."""
+        return (
+            get_catalog().version,
+            ASSET_INDEX.version,
+            STATIC_FINGERPRINTS.current_version(),
+            app.config["STATIC_VERSION"],
+            datetime.utcnow().year,
+        )
 
-            # For HERO video ("video 1"), prefer an external URL (Cloudflare R2 / Drive / direct).
-            if base.lower() == "video 1":
-                raw = (app.config.get("VIDEO_1_URL") or "").strip()
-                if raw:
-                    drive_id = extract_drive_file_id(raw)
-                    if drive_id:
-                        return drive_direct_download_candidates(drive_id)
-                    return [raw]
+    def cached_page(view):
+        """Serve a GET page from PAGE_CACHE with a strong ETag and If-None-Match -> 304.
+
+        Requests with pending flash messages bypass the cache (the page must render them).
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if "_flashes" in session or PAGE_CACHE.max_entries <= 0:
+                return view(*args, **kwargs)
+
+            key = (
+                request.endpoint,
+                tuple(sorted(request.view_args.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                content_version(),
+            )
+            page = PAGE_CACHE.get(key)
+            if page is None:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.direct_passthrough:
+                    return resp
+                body = resp.get_data()
+                page = CachedPage(body=body, etag=hashlib.sha1(body).hexdigest(), mimetype=resp.mimetype)
+                PAGE_CACHE.put(key, page)
+            else:
+                resp = app.response_class(page.body, mimetype=page.mimetype)
+
+            resp.set_etag(page.etag)
+            return resp.make_conditional(request)
+
+        return wrapper
+
+    @app.cli.command("build-images")
+    def build_images_command():
+        """Generate responsive WebP/AVIF derivatives, placeholders + manifests (run at build time)."""
+        build_image_derivatives(APP_DIR / "static")
+        build_image_placeholders(APP_DIR / "static")
+
+    @app.cli.command("startup-report")
+    def startup_report_command():
+        """Print cold-start laps and the time to render the homepage once."""
+        with app.test_client() as client:
+            client.get("/")
+        print(json.dumps(STARTUP.report(), indent=1))
+
+    @app.cli.command("compress-static")
+    def compress_static_command():
+        """Write .gz/.br siblings of CSS/JS/SVG/JSON files (run at build time, after build-images)."""
+        build_precompressed_static(APP_DIR / "static")
+
+    @app.cli.command("build-qr")
+    def build_qr_command():
+        """Render the QR images for the configured URLs (run at build time, so pages never do)."""
+        for name, key in QR_CODES.items():
+            url = (app.config.get(key) or "").strip()
+            print(f"{name}: {QR_CACHE.filename(name, url, app.config.get('QR_FORMAT', 'png')) if url else '-'}")
+
+    @app.cli.command("build-pdfs")
+    def build_pdfs_command():
+        """Assemble the full catalog and per-product PDFs into PDF_CACHE_DIR."""
+        catalog = CATALOG_STORE.current()
+        jobs = [("katalog", "", "X-Estetik - katalog")] + [(p.slug, p.slug, f"X-Estetik - {p.name}") for p in catalog.products]
+        for name, slug, title in jobs:
+            path = catalog_pdf(app, name, catalog_pdf_pages(catalog, slug), title=title)
+            if path is not None:
+                print(f"{path.name}  {path.stat().st_size // 1024} KB")
+
+    # Reply links in admin/notifications.html; static_url for fingerprinted static assets.
+    app.jinja_env.globals.update(mailto_link=mailto_link, gmail_compose_link=gmail_compose_link, static_url=static_url)
+    app.jinja_env.globals["qr_url"] = lambda name: qr_url(app, name)
+
+    # Settings read by inject_globals(); the memoized context is rebuilt when any of them changes.
+    context_config_keys = (
+        "SITE_NAME", "BRAND", "CONTACT_EMAIL", "CONTACT_PHONE", "CONTACT_NOTE",
+        "COMPANY_NAME", "COMPANY_NIP", "COMPANY_ADDRESS",
+        "INSTAGRAM_URL", "INSTAGRAM_HANDLE", "FACEBOOK_URL", "FACEBOOK_HANDLE",
+        "STATIC_VERSION", "FILMY_BASE_URL", "FILMY_FILES", "VIDEO_1_URL",
+    )
 
-            # Prefer local static file when present.
-            local = resolve_static_video(base)
-            if local:
-                return [local]
+    def context_key() -> tuple:
+        return (
+            get_catalog().version,
+            ASSET_INDEX.version,
+            STATIC_FINGERPRINTS.current_version(),
+            request.script_root,
+            tuple(app.config.get(k) for k in context_config_keys),
+        )
 
+    def resolve_video_urls(video_base: str) -> list[str]:
+        """Return a list of candidate URLs for a given video base name."""
+        base = (video_base or "").strip()
+        if not base:
             return []
 
-        def resolve_video(video_base: str) -> str:
-            urls = resolve_video_urls(video_base)
-            return urls[0] if urls else ""
+        # For HERO video ("video 1"), prefer an external URL (Cloudflare R2 / Drive / direct).
+        if base.lower() == "video 1":
+            raw = (app.config.get("VIDEO_1_URL") or "").strip()
+            if raw:
+                drive_id = extract_drive_file_id(raw)
+                if drive_id:
+                    return drive_direct_download_candidates(drive_id)
+                return [raw]
+
+        # Prefer local static file when present.
+        local = resolve_static_video(base)
+        if local:
+            return [local]
+
+        return []
 
+    def build_context_globals() -> Mapping:
         whatsapp_number = re.sub(r"\D", "", app.config.get("CONTACT_PHONE", ""))
         whatsapp_url = f"https://wa.me/{whatsapp_number}" if whatsapp_number else ""
 
-        return {
+        return MappingProxyType({
             "SITE_NAME": app.config["SITE_NAME"],
             "BRAND": app.config["BRAND"],
             "CONTACT_EMAIL": app.config["CONTACT_EMAIL"],
@@ -852,36 +1246,46 @@ def create_app() -> Flask:
             "INSTAGRAM_HANDLE": app.config.get("INSTAGRAM_HANDLE", ""),
             "FACEBOOK_URL": app.config.get("FACEBOOK_URL", ""),
             "FACEBOOK_HANDLE": app.config.get("FACEBOOK_HANDLE", ""),
-            "HAS_ACCESSORIES": any(p.category == "accessories" for p in PRODUCTS),
+            "HAS_ACCESSORIES": get_catalog().has_accessories,
             "STATIC_VERSION": app.config["STATIC_VERSION"],
-            "CURRENT_YEAR": datetime.utcnow().year,
-            "video_url": resolve_video,
-            "video_urls": resolve_video_urls,
 
             # Public R2 showcase clips (homepage + /filmy)
-            "R2_SHOWCASE": build_r2_showcase(),
+            "R2_SHOWCASE": tuple(freeze_view(clip) for clip in build_r2_showcase()),
+        })
+
+    def context_globals() -> Mapping:
+        return CONTEXT_MEMO.get(context_key(), "globals", build_context_globals)
 
+    def memo_video_urls(video_base: str) -> tuple:
+        return CONTEXT_MEMO.get(context_key(), ("video", video_base), lambda: tuple(resolve_video_urls(video_base)))
+
+    def memo_video_url(video_base: str) -> str:
+        urls = memo_video_urls(video_base)
+        return urls[0] if urls else ""
+
+    @app.context_processor
+    def inject_globals():
+        return {
+            **context_globals(),
+            "CURRENT_YEAR": datetime.utcnow().year,
+            "video_url": memo_video_url,
+            "video_urls": memo_video_urls,
         }
+
     @app.get("/")
+    @cached_page
     def index():
         # Homepage blocks
+        catalog = get_catalog()
         home_reviews = sample_reviews()[:6]
 
         # WhatsApp number for wa.me links (digits only, incl. country code)
         whatsapp_number = re.sub(r"\D", "", app.config.get("CONTACT_PHONE", ""))
-        def home_sort_key(p: Product):
-            # Sort by the explicit homepage order first; then fall back to name.
-            return (HOME_PAGE_ORDER_MAP.get(p.slug, 10**9), p.name.lower())
-
-        lasers_all = sorted([p for p in PRODUCTS if p.category == "lasers"], key=home_sort_key)
-        hi_tech_all = sorted([p for p in PRODUCTS if p.category == "hi-tech"], key=home_sort_key)
-        accessories_all = sorted([p for p in PRODUCTS if p.category == "accessories"], key=home_sort_key)
         # Homepage mini-portfolio (Strony WWW) – always show 4 images:
         # first two are pinned, the next two are taken from the folder.
                 # Strony WWW mini-block images (prefer Cloudflare R2, fallback to local static folder).
         strony_base = (app.config.get("STRONY_WWW_BASE_URL") or "").rstrip("/")
-        strony_files_raw = app.config.get("STRONY_WWW_FILES") or ""
-        strony_files = [s.strip() for s in strony_files_raw.split(",") if s.strip()]
+        strony_files = strony_www_files(app)
 
         pinned = [
             "e37b8879-cff3-42eb-aa09-7395d7cc2880.png",
@@ -891,11 +1295,11 @@ def create_app() -> Flask:
         home_strony_images = []
 
         if strony_base and strony_files:
-            # Keep pinned first, then fill up to 4 images.
+            # Keep pinned first, then fill up to 4 images (small WebP tiles from the local mirror).
             selected = [fn for fn in pinned if fn in strony_files]
             extra = [fn for fn in strony_files if fn not in selected]
             selected += extra[: max(0, 4 - len(selected))]
-            home_strony_images = [f"{strony_base}/{fn}" for fn in selected]
+            home_strony_images = [strony_www_sources(fn, 320) for fn in selected]
         else:
             # Fallback: try local /static/img/strony_www
             try:
@@ -907,15 +1311,15 @@ def create_app() -> Flask:
                     local_pinned = [p for p in all_imgs if p.name in pinned]
                     local_extra = [p for p in all_imgs if p.name not in pinned]
                     selected = (local_pinned + local_extra)[:4]
-                    home_strony_images = [f"img/strony_www/{p.name}" for p in selected]
+                    home_strony_images = [{"src": static_url(f"img/strony_www/{p.name}"), "srcset": ""} for p in selected]
             except Exception:
                 pass
 
         return render_template(
             "index.html",
-            lasers_products=[to_view(p) for p in lasers_all],
-            hi_tech_products=[to_view(p) for p in hi_tech_all],
-            accessories_products=[to_view(p) for p in accessories_all],
+            lasers_products=[product_view(p) for p in catalog.home("lasers")],
+            hi_tech_products=[product_view(p) for p in catalog.home("hi-tech")],
+            accessories_products=[product_view(p) for p in catalog.home("accessories")],
             home_reviews=home_reviews,
             whatsapp_number=whatsapp_number,
             home_strony_images=home_strony_images,
@@ -947,19 +1351,19 @@ def create_app() -> Flask:
         return render_template("gielda.html")
 
     @app.get("/lasery")
+    @cached_page
     def lasers():
-        prods = [p for p in PRODUCTS if p.category == "lasers"]
-        return render_products_list("lasers", prods)
+        return render_products_list("lasers", **listing_filters(request.args))
 
     @app.get("/urzadzenia-hi-tech")
+    @cached_page
     def hi_tech():
-        prods = [p for p in PRODUCTS if p.category == "hi-tech"]
-        return render_products_list("hi-tech", prods)
+        return render_products_list("hi-tech", **listing_filters(request.args))
 
     @app.get("/akcesoria")
+    @cached_page
     def accessories():
-        prods = [p for p in PRODUCTS if p.category == "accessories"]
-        return render_products_list("accessories", prods)
+        return render_products_list("accessories", **listing_filters(request.args))
 
     @app.get("/opinie")
     def reviews():
@@ -968,24 +1372,24 @@ def create_app() -> Flask:
     @app.get("/media-spolecznosciowe")
     def social():
         socials = [
-            {"label": "Instagram", "handle": app.config.get("INSTAGRAM_HANDLE", ""), "url": app.config.get("INSTAGRAM_URL", ""), "qr": url_for("static", filename="img/qr/instagram.png")},
+            {"label": "Instagram", "handle": app.config.get("INSTAGRAM_HANDLE", ""), "url": app.config.get("INSTAGRAM_URL", ""), "qr": qr_url(app, "instagram")},
 
-            {"label": "Facebook — fanpage firmowy", "handle": app.config.get("FACEBOOK_HANDLE", ""), "url": app.config.get("FACEBOOK_URL", ""), "qr": url_for("static", filename="img/qr/facebook.png")},
-            {"label": "Facebook — laser diodowy do epilacji", "handle": app.config.get("FACEBOOK_EPILACJA_HANDLE", ""), "url": app.config.get("FACEBOOK_EPILACJA_URL", ""), "qr": url_for("static", filename="img/qr/facebook_epilacja.png")},
-            {"label": "Facebook — Estetik Frax", "handle": app.config.get("FACEBOOK_ESTETIK_FRAX_HANDLE", ""), "url": app.config.get("FACEBOOK_ESTETIK_FRAX_URL", ""), "qr": url_for("static", filename="img/qr/facebook_estetik_frax.png")},
-            {"label": "Facebook — laser tulowy + erbowo szklany", "handle": app.config.get("FACEBOOK_TULOWY_ERBO_HANDLE", ""), "url": app.config.get("FACEBOOK_TULOWY_ERBO_URL", ""), "qr": url_for("static", filename="img/qr/facebook_tulowy_erbo.png")},
+            {"label": "Facebook — fanpage firmowy", "handle": app.config.get("FACEBOOK_HANDLE", ""), "url": app.config.get("FACEBOOK_URL", ""), "qr": qr_url(app, "facebook")},
+            {"label": "Facebook — laser diodowy do epilacji", "handle": app.config.get("FACEBOOK_EPILACJA_HANDLE", ""), "url": app.config.get("FACEBOOK_EPILACJA_URL", ""), "qr": qr_url(app, "facebook_epilacja")},
+            {"label": "Facebook — Estetik Frax", "handle": app.config.get("FACEBOOK_ESTETIK_FRAX_HANDLE", ""), "url": app.config.get("FACEBOOK_ESTETIK_FRAX_URL", ""), "qr": qr_url(app, "facebook_estetik_frax")},
+            {"label": "Facebook — laser tulowy + erbowo szklany", "handle": app.config.get("FACEBOOK_TULOWY_ERBO_HANDLE", ""), "url": app.config.get("FACEBOOK_TULOWY_ERBO_URL", ""), "qr": qr_url(app, "facebook_tulowy_erbo")},
         ]
         socials = [s for s in socials if s.get("url")]
         return render_template("social.html", socials=socials)
     @app.get("/strony-www-dla-gabinetow")
+    @cached_page
     def strony_www_dla_gabinetow():
         # Portfolio images: prefer Cloudflare R2, fallback to local /static/img/strony_www
         strony_base = (app.config.get("STRONY_WWW_BASE_URL") or "").rstrip("/")
-        strony_files_raw = app.config.get("STRONY_WWW_FILES") or ""
-        strony_files = [s.strip() for s in strony_files_raw.split(",") if s.strip()]
+        strony_files = strony_www_files(app)
 
         if strony_base and strony_files:
-            portfolio_images = [f"{strony_base}/{fn}" for fn in strony_files]
+            portfolio_images = [strony_www_sources(fn, 640) for fn in strony_files]
         else:
             folder = APP_DIR / 'static' / 'img' / 'strony_www'
             exts = {'.png', '.jpg', '.jpeg', '.webp', '.gif'}
@@ -1003,7 +1407,7 @@ def create_app() -> Flask:
                         continue
                     files.append(fp)
             files.sort(key=lambda x: x.name.lower())
-            portfolio_images = [f"img/strony_www/{fp.name}" for fp in files]
+            portfolio_images = [{"src": static_url(f"img/strony_www/{fp.name}"), "srcset": ""} for fp in files]
 
         return render_template(
             "strony_www.html",
@@ -1012,49 +1416,108 @@ def create_app() -> Flask:
             portfolio_images=portfolio_images,
         )
 
+    @app.get("/img/strony-www/<path:name>")
+    def strony_www_image_file(name: str):
+        # Only objects listed in STRONY_WWW_FILES: the mirror is not an open proxy.
+        base = (app.config.get("STRONY_WWW_BASE_URL") or "").rstrip("/")
+        if not base or name not in strony_www_files(app):
+            abort(404)
+        width = request.args.get("w", type=int) or 0
+        if width and width not in REMOTE_THUMB_WIDTHS:
+            abort(404)
+        url = f"{base}/{quote(name)}"
+        try:
+            path = REMOTE_IMAGES.thumbnail(url, width) if width else REMOTE_IMAGES.original(url)
+        except RemoteImageError as e:
+            app.logger.warning("remote image unavailable: %s", e)
+            resp = redirect(url)
+            resp.headers["Cache-Control"] = "no-store"
+            return resp
+        mimetype = "image/webp" if width else (mimetypes.guess_type(name)[0] or "application/octet-stream")
+        resp = send_file(path, mimetype=mimetype, conditional=True)
+        # R2 object names are UUIDs, so a name never changes content.
+        resp.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return resp
+
     @app.get("/filmy")
+    @cached_page
     def filmy():
-        return render_template("filmy.html", filmy_showcase=build_r2_showcase())
+        return render_template("filmy.html", filmy_showcase=context_globals()["R2_SHOWCASE"])
 
     @app.get("/produkt/<slug>")
+    @cached_page
     def product_detail(slug: str):
-        p = PRODUCTS_BY_SLUG.get(slug)
+        p = get_catalog().by_slug.get(slug)
         if not p:
             abort(404)
 
-        meta = CATEGORY_META.get(p.category, {})
-        back_label = meta.get("label", "Lista")
-        back_route = meta.get("route", "index")
-        back_url = url_for(back_route)
-
-        view = to_view(p)
-        view["back_label"] = back_label
-        view["back_url"] = back_url
-        view["hero"] = view["thumb"] if view.get("photo_base") else (first_gallery_image(slug) or view["thumb"])
-        view["gallery"] = list_gallery_images(slug)
-
-        # Effects (before/after) — visible for selected devices
-        effects_folder = (p.effects_folder or "").strip()
-        effects_url = (p.effects_url or "").strip()
-        effects_enabled = bool(effects_folder or effects_url)
-        folder = effects_folder or p.slug
-        effects_images = list_effect_images(folder)
-        # Optional fallback: if mapping uses a custom folder but it's empty
-        if not effects_images and effects_folder and effects_folder != p.slug:
-            effects_images = list_effect_images(p.slug)
-
+        view = product_view(p)
         return render_template(
             "product_detail.html",
             product=view,
-            effects_enabled=effects_enabled,
-            effects_images=effects_images,
-            effects_folder=folder,
-            effects_tech_url=effects_url,
+            effects_enabled=view["effects_enabled"],
+            effects_images=view["effects_images"],
+            effects_folder=view["effects_dir"],
+            effects_tech_url=(p.effects_url or "").strip(),
         )
 
+    @app.get("/api/search")
+    def api_search():
+        """Ranked product search across all categories (typeahead: the last word may be partial)."""
+        q = (request.args.get("q") or "").strip()[:100]
+        category = (request.args.get("category") or "").strip()
+        try:
+            limit = min(50, max(1, int(request.args.get("limit") or 10)))
+        except ValueError:
+            limit = 10
+
+        catalog = get_catalog()
+        started = time.perf_counter()
+        hits = product_search_index(catalog).search(q, limit=limit, category=category)
+        took_ms = (time.perf_counter() - started) * 1000
+
+        results = []
+        for p, score in hits:
+            view = product_view(p)
+            results.append({
+                "slug": p.slug,
+                "name": p.name,
+                "tag": p.tag,
+                "category": p.category,
+                "category_label": view["category_label"],
+                "price": p.price,
+                "url": url_for("product_detail", slug=p.slug),
+                "thumb": view["thumb"],
+                "score": round(score, 2),
+            })
+        return {"query": q, "took_ms": round(took_ms, 3), "results": results}
+
+    def send_catalog_pdf(path: Path, download_name: str):
+        # conditional=True: ETag / If-None-Match / If-Modified-Since and Range requests.
+        resp = send_file(path, mimetype="application/pdf", as_attachment=True, download_name=download_name, conditional=True)
+        resp.headers["Cache-Control"] = "public, max-age=3600"
+        return resp
+
     @app.get("/katalog")
     def catalog_download():
-        return send_from_directory(APP_DIR / "static" / "pdf", "X-Estetik-Katalog-2026.pdf", as_attachment=True)
+        # A hand-made PDF in static/pdf/ wins; otherwise the catalog is assembled from the gallery pages.
+        static_pdf = APP_DIR / "static" / "pdf" / "X-Estetik-Katalog-2026.pdf"
+        if static_pdf.is_file():
+            return send_catalog_pdf(static_pdf, static_pdf.name)
+        path = catalog_pdf(app, "katalog", catalog_pdf_pages(get_catalog()), title="X-Estetik - katalog")
+        if path is None:
+            abort(404)
+        return send_catalog_pdf(path, "X-Estetik-Katalog.pdf")
+
+    @app.get("/katalog/<slug>.pdf")
+    def product_catalog_pdf(slug: str):
+        p = get_catalog().by_slug.get(slug)
+        if not p:
+            abort(404)
+        path = catalog_pdf(app, slug, catalog_pdf_pages(get_catalog(), slug), title=f"X-Estetik - {p.name}")
+        if path is None:
+            abort(404)
+        return send_catalog_pdf(path, f"X-Estetik-{slug}.pdf")
 
     @app.post("/lead")
     def lead():
@@ -1072,16 +1535,69 @@ def create_app() -> Flask:
             flash("Zaznacz zgodę na Politykę prywatności, aby wysłać formularz.", "error")
             return redirect(request.referrer or url_for("index") + "#kontakt")
 
-        lead_id, created_at = save_lead(app, name=name, email=email, phone=phone, message=message, path=(request.referrer or ""))
-        archive_lead_to_disk(app, lead_id=lead_id, created_at=created_at, name=name, email=email, phone=phone, message=message, source_path=(request.referrer or ""))
-        sent = send_lead_email(app, lead_id=lead_id, created_at=created_at, name=name, email=email, phone=phone, message=message, source_path=(request.referrer or ""))
+        # Archiving and the e-mail notification are queued in the outbox (same transaction)
+        # and delivered by the background worker, so a slow SMTP relay never blocks here.
+        save_lead(app, name=name, email=email, phone=phone, message=message, path=(request.referrer or ""))
+        LEAD_OUTBOX.notify(app)
 
-        if sent:
+        if mail_configured(app):
             flash("Dziękujemy! Wiadomość została wysłana. Skontaktujemy się najszybciej jak to możliwe.", "success")
         else:
             flash("Dziękujemy! Wiadomość została zapisana. Skontaktujemy się najszybciej jak to możliwe.", "success")
         return redirect((request.referrer or url_for("index")) + "#kontakt")
 
+    @app.before_request
+    def _startup_first_request():
+        if STARTUP.first_request is None:
+            request.environ["xestetik.started"] = time.perf_counter()
+
+    @app.after_request
+    def _startup_first_response(resp):
+        started = request.environ.get("xestetik.started")
+        if started is not None:
+            STARTUP.record_first_request(request.endpoint or "", started)
+        return resp
+
+    @app.before_request
+    def _outbox_worker_alive():
+        # Cheap pid check; restarts the delivery thread after a fork (gunicorn workers).
+        LEAD_OUTBOX.ensure_running(app)
+
+    @app.before_request
+    def _static_precompressed():
+        # Serve site.css.br / site.css.gz built by `flask compress-static` when the client accepts it.
+        if request.endpoint != "static":
+            return None
+        filename = (request.view_args or {}).get("filename", "")
+        variant = precompressed_variant(APP_DIR / "static", filename)
+        if variant is None:
+            return None
+        encoding, variant_name = variant
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        resp = send_from_directory(
+            APP_DIR / "static", variant_name, mimetype=mimetype, max_age=app.get_send_file_max_age(filename)
+        )
+        resp.headers["Content-Encoding"] = encoding
+        return resp
+
+    @app.after_request
+    def _static_cache_headers(resp):
+        if request.endpoint != "static":
+            return resp
+        filename = (request.view_args or {}).get("filename", "")
+        if Path(filename).suffix.lower() in COMPRESSIBLE_STATIC_EXTS:
+            resp.vary.add("Accept-Encoding")
+        # Fingerprinted URLs (?v=<content hash>, or hashed derivative names) never change.
+        if resp.status_code in (200, 206, 304) and STATIC_FINGERPRINTS.is_fingerprinted(filename, request.args.get("v", "")):
+            resp.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return resp
+
+    @app.after_request
+    def _compress_dynamic(resp):
+        # Static files are precompressed at build time (`flask compress-static`).
+        if request.endpoint == "static":
+            return resp
+        return compress_response(resp, app.config["COMPRESS_LEVEL"], app.config["COMPRESS_MIN_BYTES"])
 
     # ----------------------------- Admin (optional) -----------------------------
 
@@ -1127,37 +1643,72 @@ def create_app() -> Flask:
             return ra
 
         q = (request.args.get("q") or "").strip()
-        page = int((request.args.get("page") or "1").strip() or 1)
+        after = (request.args.get("after") or "").strip()
+        before = (request.args.get("before") or "").strip()
+        try:
+            page = max(1, int((request.args.get("page") or "1").strip() or 1)) if (after or before) else 1
+        except ValueError:
+            page = 1
         per_page = 50
-        offset = max(0, page - 1) * per_page
-
-        where_sql = ""
-        params: list = []
-        if q:
-            ql = f"%{q.lower()}%"
-            where_sql = " WHERE lower(name) LIKE ? OR lower(email) LIKE ? OR lower(phone) LIKE ? OR lower(message) LIKE ?"
-            params = [ql, ql, ql, ql]
-
-        with get_db(app) as conn:
-            total = conn.execute(f"SELECT COUNT(1) AS c FROM leads{where_sql}", params).fetchone()["c"]
-            rows = conn.execute(
-                f"SELECT * FROM leads{where_sql} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
-                params + [per_page, offset],
-            ).fetchall()
 
+        result = fetch_leads_page(app, q=q, after=after, before=before, per_page=per_page)
+        total = result["total"]
         total_pages = max(1, (total + per_page - 1) // per_page)
-        leads = [dict(r) for r in rows]
 
         return render_template(
             "admin/notifications.html",
-            leads=leads,
+            leads=result["leads"],
             q=q,
-            page=page,
+            page=min(page, total_pages),
             total_pages=total_pages,
             total=total,
+            next_cursor=result["next_cursor"],
+            prev_cursor=result["prev_cursor"],
+            mail_archive=bool((app.config.get("MAIL_ARCHIVE_DIR") or "").strip()),
+        )
+
+    @app.get("/admin/leads/<int:lead_id>/mail")
+    def admin_lead_mail(lead_id: int):
+        ra = require_admin()
+        if ra:
+            return ra
+
+        data = find_archived_mail(app, lead_id)
+        if data is None:
+            abort(404)
+        resp = make_response(data)
+        resp.headers["Content-Type"] = "message/rfc822"
+        resp.headers["Content-Disposition"] = f'attachment; filename="lead_{lead_id}.eml"'
+        return resp
+
+    @app.get("/admin/leads/export")
+    def admin_leads_export():
+        ra = require_admin()
+        if ra:
+            return ra
+
+        fmt = (request.args.get("format") or "csv").strip().lower()
+        if fmt not in {"csv", "jsonl"}:
+            abort(400)
+        date_from = (request.args.get("from") or "").strip()
+        date_to = (request.args.get("to") or "").strip()
+        for d in (date_from, date_to):
+            if d and not re.fullmatch(r"\d{4}-\d{2}-\d{2}", d):
+                abort(400)
+        q = (request.args.get("q") or "").strip()
+
+        filename = f"leads_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        resp = Response(
+            stream_with_context(iter_leads_export(app, fmt, q=q, date_from=date_from, date_to=date_to)),
+            mimetype=mimetype,
         )
+        resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        resp.headers["Cache-Control"] = "no-store"
+        return resp
 
     @app.get("/polityki/<slug>")
+    @cached_page
     def policy(slug: str):
         policies = policy_content(app)
         if slug not in policies:
@@ -1167,138 +1718,858 @@ def create_app() -> Flask:
 
     @app.get("/health")
     def health():
-        return {"status": "ok", "products": len(PRODUCTS)}
+        return {"status": "ok", "products": len(get_catalog().products)}
+
+    @app.get("/admin/health")
+    def admin_health():
+        ra = require_admin()
+        if ra:
+            return ra
+
+        return {
+            "status": "ok",
+            "catalog": CATALOG_STORE.stats(),
+            "remote_images": REMOTE_IMAGES.stats(),
+            "page_cache": PAGE_CACHE.stats(),
+            "compressed_pages": COMPRESSED_PAGES.stats(),
+            "db": DB_STATS.stats(),
+            "startup": STARTUP.report(),
+        }
 
     @app.errorhandler(404)
     def _404(_e):
         return render_template("404.html"), 404
 
+    STARTUP.lap("create_app: routes")
     return app
 
 
-# ----------------------------- Views -----------------------------
+# ----------------------------- Static asset index -----------------------------
 
-def resolve_static_photo(photo_base: str) -> str:
-    """Resolve a product photo URL from static/photos by base name.
+PHOTO_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".jfif"}
+VIDEO_EXT_PRIORITY = {".mp4": 0, ".mov": 1, ".m4v": 2, ".webm": 3}
+GALLERY_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
 
-    - Matches the base name (stem) case-insensitively.
-    - Accepts .jpg/.jpeg/.png/.webp/.jfif (any extension case, e.g. .JPEG).
-    - Returns the real filename so the URL matches the filesystem exactly.
+
+def normalize_asset_name(s: str) -> str:
+    """Normalize a file stem so it survives Windows/Explorer copy-paste of “fancy” dashes/spaces.
+
+    (e.g. X‑Levage uses U+2011 non‑breaking hyphen, not ASCII '-').
     """
-    if not photo_base:
+    if not s:
         return ""
+    s = s.replace("\u00A0", " ")  # NBSP
+    dash_chars = "\u2010\u2011\u2012\u2013\u2014\u2212\uFE58\uFE63\uFF0D"
+    for ch in dash_chars:
+        s = s.replace(ch, "-")
+    s = s.strip().lower()
+    s = re.sub(r"\s+", " ", s)
+    return s
 
-    folder = APP_DIR / "static" / "photos"
-    if not folder.exists():
-        return ""
 
-    # Normalize to survive Windows/Explorer copy-paste of “fancy” dashes/spaces
-    # (e.g. X‑Levage uses U+2011 non‑breaking hyphen, not ASCII '-').
-    def _norm(s: str) -> str:
-        if not s:
-            return ""
-        s = s.replace("\u00A0", " ")  # NBSP
-        dash_chars = "\u2010\u2011\u2012\u2013\u2014\u2212\uFE58\uFE63\uFF0D"
-        for ch in dash_chars:
-            s = s.replace(ch, "-")
-        s = s.strip().lower()
-        s = re.sub(r"\s+", " ", s)
-        return s
+@dataclass(frozen=True)
+class AssetSnapshot:
+    """Immutable view of the static folders used by the catalog pages."""
+    version: int = 0
+    photos: Dict[str, str] = field(default_factory=dict)  # normalized stem -> real filename
+    videos: Dict[str, str] = field(default_factory=dict)  # normalized stem -> real filename
+    catalog: Dict[str, tuple] = field(default_factory=dict)  # slug -> sorted page filenames
+    effects: Dict[str, tuple] = field(default_factory=dict)  # folder -> sorted image filenames
+    derivatives: Dict[str, dict] = field(default_factory=dict)  # static-relative source -> manifest entry
+    placeholders: Dict[str, dict] = field(default_factory=dict)  # static-relative source -> size/color/lqip
+    mtimes: Dict[str, int] = field(default_factory=dict)  # watched dir -> st_mtime_ns
+
+
+class StaticAssetIndex:
+    """In-memory index of static/photos, static/video, static/img/catalog, static/efekty
+    and the image manifests (static/img/derived/manifest.json, placeholders.json).
+
+    Built once at startup; afterwards the watched directories are re-stat'ed at most
+    once per ``check_interval`` seconds and the index is rebuilt only when a directory
+    mtime changed. Readers always get a complete snapshot (swapped atomically).
+    """
 
-    wanted = _norm(photo_base)
-    allowed = {".jpg", ".jpeg", ".png", ".webp", ".jfif"}
+    def __init__(self, static_dir: Path, check_interval: float = 2.0):
+        self.static_dir = static_dir
+        self.check_interval = check_interval
+        self._snapshot = AssetSnapshot()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self.snapshot().version
+
+    def snapshot(self) -> AssetSnapshot:
+        if self.check_interval >= 0 and time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self, force: bool = False) -> AssetSnapshot:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            current = self._snapshot
+            if force or not current.version or self._watched_mtimes() != current.mtimes:
+                self._snapshot = self._build(current.version + 1)
+            return self._snapshot
+
+    def _watched_dirs(self) -> List[Path]:
+        dirs = [self.static_dir / "photos", self.static_dir / "video", self.static_dir / DERIVED_DIR]
+        for parent in (self.static_dir / "img" / "catalog", self.static_dir / "efekty"):
+            dirs.append(parent)
+            dirs.extend(self._subdirs(parent))
+        return dirs
+
+    @staticmethod
+    def _subdirs(folder: Path) -> List[Path]:
+        try:
+            return sorted(p for p in folder.iterdir() if p.is_dir())
+        except OSError:
+            return []
 
-    try:
-        for fp in folder.iterdir():
-            if not fp.is_file():
-                continue
-            if fp.suffix.lower() not in allowed:
+    @staticmethod
+    def _files(folder: Path, exts: set) -> List[Path]:
+        try:
+            return sorted(p for p in folder.iterdir() if p.is_file() and p.suffix.lower() in exts)
+        except OSError:
+            return []
+
+    def _watched_mtimes(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for d in self._watched_dirs():
+            try:
+                out[str(d)] = d.stat().st_mtime_ns
+            except OSError:
                 continue
-            if _norm(fp.stem) == wanted:
-                return url_for("static", filename=f"photos/{fp.name}")
-    except Exception:
-        return ""
+        return out
+
+    def _build(self, version: int) -> AssetSnapshot:
+        # Take the mtimes first: a change racing with the scan triggers another rebuild.
+        mtimes = self._watched_mtimes()
+
+        photos: Dict[str, str] = {}
+        for fp in self._files(self.static_dir / "photos", PHOTO_EXTS):
+            photos.setdefault(normalize_asset_name(fp.stem), fp.name)
+
+        videos: Dict[str, str] = {}
+        best: Dict[str, int] = {}
+        for fp in self._files(self.static_dir / "video", set(VIDEO_EXT_PRIORITY)):
+            key = normalize_asset_name(fp.stem)
+            prio = VIDEO_EXT_PRIORITY[fp.suffix.lower()]
+            if prio < best.get(key, 999):
+                best[key] = prio
+                videos[key] = fp.name
+
+        catalog = {
+            d.name: tuple(fp.name for fp in self._files(d, GALLERY_EXTS))
+            for d in self._subdirs(self.static_dir / "img" / "catalog")
+        }
+        effects = {
+            d.name: tuple(fp.name for fp in self._files(d, GALLERY_EXTS))
+            for d in self._subdirs(self.static_dir / "efekty")
+        }
+
+        return AssetSnapshot(
+            version=version,
+            photos=photos,
+            videos=videos,
+            catalog=catalog,
+            effects=effects,
+            derivatives=load_derivatives_manifest(self.static_dir),
+            placeholders=load_image_placeholders(self.static_dir),
+            mtimes=mtimes,
+        )
 
-    return ""
 
+ASSET_INDEX = StaticAssetIndex(APP_DIR / "static")
 
-def resolve_static_video(video_base: str) -> str:
-    """Resolve a video URL from static/video by base name (stem), extension-agnostic.
 
-    - Matches the base name (stem) case-insensitively.
-    - Accepts .mp4/.mov/.m4v/.webm (any extension case).
-    - Normalizes “fancy” dashes/spaces (e.g. U+2011) to survive Windows Explorer names.
-    - Returns the real filename so the URL matches the filesystem exactly.
+# ----------------------------- Static fingerprints -----------------------------
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CORE_STATIC_FILES = ("css/site.css", "js/site.js", "js/site_extra.js")
+
+
+class StaticFingerprints:
+    """Content hashes of files under static/, computed lazily and kept per (mtime, size).
+
+    ``static_url()`` appends the hash as ``?v=`` so a URL changes only when the file does;
+    such responses are served with an immutable Cache-Control. Known files are re-stat'ed
+    at most once per ``check_interval`` seconds; ``version`` bumps when any hash changed,
+    so cached pages holding old URLs are re-rendered.
     """
-    if not video_base:
-        return ""
 
-    folder = APP_DIR / "static" / "video"
-    if not folder.exists():
-        return ""
+    def __init__(self, static_dir: Path, check_interval: float = 2.0):
+        self.static_dir = static_dir
+        self.check_interval = check_interval
+        self.version = 0
+        self._digests: Dict[str, tuple] = {}  # filename -> (mtime_ns, size, digest)
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def digest(self, filename: str) -> str:
+        """Short sha1 of static/<filename>, or "" when it is not a regular file."""
+        path = self.static_dir / filename
+        try:
+            st = path.stat()
+        except OSError:
+            return ""
+        cached = self._digests.get(filename)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
 
-    def _norm(s: str) -> str:
-        if not s:
+        h = hashlib.sha1()
+        try:
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        except OSError:
             return ""
-        s = s.replace("\u00A0", " ")  # NBSP
-        dash_chars = "\u2010\u2011\u2012\u2013\u2014\u2212\uFE58\uFE63\uFF0D"
-        for ch in dash_chars:
-            s = s.replace(ch, "-")
-        s = s.strip().lower()
-        s = re.sub(r"\s+", " ", s)
-        return s
+        value = h.hexdigest()[:12]
+        with self._lock:
+            if cached and cached[2] != value:
+                self.version += 1
+            self._digests[filename] = (st.st_mtime_ns, st.st_size, value)
+        return value
 
-    wanted = _norm(video_base)
-    allowed = {".mp4", ".mov", ".m4v", ".webm"}
+    def current_version(self) -> int:
+        if self.check_interval >= 0 and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            for filename in list(self._digests):
+                self.digest(filename)
+        return self.version
 
-    # Prefer mp4 then mov then m4v/webm
-    ext_priority = {".mp4": 0, ".mov": 1, ".m4v": 2, ".webm": 3}
+    def bundle_digest(self, filenames=CORE_STATIC_FILES) -> str:
+        """One hash for a group of files (default STATIC_VERSION)."""
+        joined = "".join(self.digest(fn) for fn in filenames)
+        return hashlib.sha1(joined.encode()).hexdigest()[:12]
 
-    best_fp = None
-    best_prio = 999
+    def is_fingerprinted(self, filename: str, v: str) -> bool:
+        """True when ``v`` matches the current content hash, or the name is content-addressed."""
+        if filename.startswith(DERIVED_DIR + "/") and filename[len(DERIVED_DIR) + 1:] not in DERIVED_MANIFESTS:
+            return True
+        if filename.startswith(QR_DIR + "/") and HASHED_QR_RE.match(filename[len(QR_DIR) + 1:]):
+            return True
+        return bool(v) and v == self.digest(filename)
 
+
+STATIC_FINGERPRINTS = StaticFingerprints(APP_DIR / "static")
+
+
+def static_url(filename: str, **values) -> str:
+    """``url_for('static', ...)`` with a content-hash ``v`` query argument."""
+    digest = STATIC_FINGERPRINTS.digest(filename)
+    if digest:
+        values["v"] = digest
+    return url_for("static", filename=filename, **values)
+
+
+# ----------------------------- Precompressed static -----------------------------
+
+COMPRESSIBLE_STATIC_EXTS = {".css", ".js", ".mjs", ".svg", ".json", ".map", ".txt", ".xml", ".html"}
+PRECOMPRESS_MIN_BYTES = 128
+# Content-Encoding -> sibling suffix, in order of preference on equal q-values.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def build_precompressed_static(static_dir: Path, log=print) -> int:
+    """Write ``.gz`` (and ``.br`` when the ``brotli`` package is installed) next to text assets.
+
+    Siblings newer than their source are kept; variants that would not save at least 10%
+    are not written, and orphaned ones are removed. Returns the number of files written.
+    """
     try:
-        for fp in folder.iterdir():
-            if not fp.is_file():
+        import brotli  # type: ignore
+    except ImportError:
+        brotli = None
+
+    compressors = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.append((".br", lambda data: brotli.compress(data, quality=11)))
+
+    written = 0
+    for path in sorted(static_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        if path.suffix in (".gz", ".br"):
+            # Only our own siblings (site.css.gz with site.css gone); foo.tar.gz is a real download.
+            source = path.with_suffix("")
+            if source.suffix.lower() in COMPRESSIBLE_STATIC_EXTS and not source.is_file():
+                path.unlink()
+            continue
+        if path.suffix.lower() not in COMPRESSIBLE_STATIC_EXTS:
+            continue
+
+        src_mtime = path.stat().st_mtime_ns
+        data = None
+        for suffix, compress in compressors:
+            out = path.with_name(path.name + suffix)
+            if out.exists() and out.stat().st_mtime_ns >= src_mtime:
                 continue
-            if fp.suffix.lower() not in allowed:
+            if data is None:
+                data = path.read_bytes()
+            packed = compress(data) if len(data) >= PRECOMPRESS_MIN_BYTES else data
+            if len(packed) > len(data) * 0.9:
+                out.unlink(missing_ok=True)
                 continue
-            if _norm(fp.stem) != wanted:
+            tmp = out.with_name(out.name + ".tmp")
+            tmp.write_bytes(packed)
+            os.replace(tmp, out)
+            written += 1
+
+    log(f"{written} precompressed files written, formats: {', '.join(s.lstrip('.') for s, _ in compressors)}")
+    return written
+
+
+def precompressed_variant(static_dir: Path, filename: str) -> Optional[tuple]:
+    """Best ``(encoding, sibling filename)`` the client accepts for static/<filename>, or None.
+
+    Only siblings at least as new as the source count, so an edited file is served as-is
+    until the build step runs again.
+    """
+    if Path(filename).suffix.lower() not in COMPRESSIBLE_STATIC_EXTS:
+        return None
+    path = safe_join(str(static_dir), filename)
+    if path is None:
+        return None
+    try:
+        src_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    accepted = request.accept_encodings
+    best = None
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        q = accepted.quality(encoding)
+        if q <= 0 or (best and q <= best[0]):
+            continue
+        try:
+            if os.stat(path + suffix).st_mtime_ns < src_mtime:
                 continue
-            prio = ext_priority.get(fp.suffix.lower(), 999)
-            if prio < best_prio:
-                best_prio = prio
-                best_fp = fp
-    except Exception:
+        except OSError:
+            continue
+        best = (q, encoding, filename + suffix)
+    return best[1:] if best else None
+
+
+# ----------------------------- Image derivatives -----------------------------
+
+DERIVED_DIR = "img/derived"  # relative to static/
+DERIVED_MANIFESTS = ("manifest.json", "placeholders.json")  # unhashed files in DERIVED_DIR
+DERIVATIVE_SOURCES = ("img/catalog", "photos", "img/thumbs")
+DERIVATIVE_WIDTHS = (480, 800, 1200, 1600)
+
+
+def load_derivatives_manifest(static_dir: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads((static_dir / DERIVED_DIR / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("images", {}) if isinstance(data, dict) else {}
+
+
+def build_image_derivatives(static_dir: Path, widths=DERIVATIVE_WIDTHS, quality: int = 80, log=print) -> Dict[str, dict]:
+    """Write resized WebP (and AVIF when Pillow supports it) copies of catalog pages and photos.
+
+    Output: static/img/derived/<source dir>/<stem>.<width>.<hash>.<fmt>, where <hash> covers the
+    source bytes and render settings, so unchanged images are skipped and URLs can be cached
+    forever. The manifest maps each source (relative to static/) to its size and variants;
+    files no longer referenced by it are removed.
+    """
+    from PIL import Image, ImageOps, features  # type: ignore
+
+    formats = [("webp", "WEBP", {"quality": quality, "method": 4})]
+    if features.check("avif"):
+        formats.append(("avif", "AVIF", {"quality": max(30, quality - 20), "speed": 8}))
+
+    out_root = static_dir / DERIVED_DIR
+    images: Dict[str, dict] = {}
+    keep: set = set()
+
+    for src_dir in DERIVATIVE_SOURCES:
+        for src in sorted((static_dir / src_dir).rglob("*")):
+            if not src.is_file() or src.suffix.lower() not in PHOTO_EXTS:
+                continue
+            rel = src.relative_to(static_dir).as_posix()
+            digest = hashlib.sha1(src.read_bytes() + repr((widths, quality)).encode()).hexdigest()[:10]
+            try:
+                with Image.open(src) as im:
+                    im = ImageOps.exif_transpose(im)
+                    im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+                    entry: Dict = {"width": im.width, "height": im.height}
+                    targets = sorted({w for w in widths if w < im.width} | {min(im.width, max(widths))})
+                    for ext, pil_format, opts in formats:
+                        variants = []
+                        for w in targets:
+                            out = out_root / Path(rel).parent / f"{src.stem}.{w}.{digest}.{ext}"
+                            keep.add(out)
+                            if not out.exists():
+                                out.parent.mkdir(parents=True, exist_ok=True)
+                                h = max(1, round(im.height * w / im.width))
+                                resized = im if w == im.width else im.resize((w, h), Image.LANCZOS)
+                                tmp = out.with_name(out.name + ".tmp")
+                                resized.save(tmp, pil_format, **opts)
+                                os.replace(tmp, out)
+                            variants.append([w, out.relative_to(static_dir).as_posix()])
+                        entry[ext] = variants
+            except Exception as e:
+                log(f"skip {rel}: {e}")
+                continue
+            images[rel] = entry
+
+    for old in out_root.rglob("*"):
+        if old.is_file() and old not in keep and not (old.parent == out_root and old.name in DERIVED_MANIFESTS):
+            old.unlink()
+
+    out_root.mkdir(parents=True, exist_ok=True)
+    tmp = out_root / "manifest.json.tmp"
+    tmp.write_text(json.dumps({"version": 1, "images": images}, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, out_root / "manifest.json")
+    log(f"{len(images)} images, formats: {', '.join(f[0] for f in formats)}")
+    return images
+
+
+PLACEHOLDER_SOURCES = ("img/catalog", "photos", "img/thumbs", "efekty")
+PLACEHOLDER_SIZE = 16  # longest side of the inline blur preview, in pixels
+
+
+def load_image_placeholders(static_dir: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads((static_dir / DERIVED_DIR / "placeholders.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("images", {}) if isinstance(data, dict) else {}
+
+
+def image_placeholder(path: Path) -> Dict:
+    """Intrinsic size, dominant color and a tiny base64 WebP preview of one image."""
+    from PIL import Image, ImageOps  # type: ignore
+
+    with Image.open(path) as im:
+        width, height = im.size
+        if im.getexif().get(0x0112) in (5, 6, 7, 8):  # EXIF orientation: rotated by 90°
+            width, height = height, width
+        # JPEGs decode at 1/2..1/8 scale straight from the DCT data, so large catalog pages stay cheap.
+        im.draft("RGB", (64, 64))
+        im = ImageOps.exif_transpose(im)
+        alpha = im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if alpha else "RGB")
+
+    small = im.copy()
+    small.thumbnail((64, 64))
+    quantized = small.convert("RGB").quantize(colors=5)
+    _count, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    im.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buf = io.BytesIO()
+    im.save(buf, "WEBP", quality=40, method=6)
+    return {
+        "width": width,
+        "height": height,
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+        "alpha": alpha,
+        "lqip": "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii"),
+    }
+
+
+def build_image_placeholders(static_dir: Path, log=print) -> Dict[str, dict]:
+    """Write static/img/derived/placeholders.json: placeholder metadata for every gallery image.
+
+    Entries are keyed by path relative to static/ and carry the source mtime/size, so a
+    rerun only decodes images that were added or changed.
+    """
+    out = static_dir / DERIVED_DIR / "placeholders.json"
+    previous = load_image_placeholders(static_dir)
+    images: Dict[str, dict] = {}
+    built = 0
+
+    for src_dir in PLACEHOLDER_SOURCES:
+        for src in sorted((static_dir / src_dir).rglob("*")):
+            if not src.is_file() or src.suffix.lower() not in GALLERY_EXTS:
+                continue
+            rel = src.relative_to(static_dir).as_posix()
+            st = src.stat()
+            stamp = f"{st.st_mtime_ns}:{st.st_size}"
+            entry = previous.get(rel)
+            if not entry or entry.get("stamp") != stamp:
+                try:
+                    entry = {**image_placeholder(src), "stamp": stamp}
+                except Exception as e:
+                    log(f"skip {rel}: {e}")
+                    continue
+                built += 1
+            images[rel] = entry
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps({"version": 1, "images": images}, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, out)
+    log(f"{len(images)} placeholders ({built} rebuilt)")
+    return images
+
+
+def image_sources(rel: str) -> Mapping:
+    """URLs for a static image: original ``src`` plus WebP/AVIF ``srcset`` strings when derived.
+
+    ``width``/``height`` (0 when unknown) let templates reserve the box; ``color`` and
+    ``lqip`` (empty for transparent images) paint it until the real file arrives.
+    """
+    snap = ASSET_INDEX.snapshot()
+    entry = snap.derivatives.get(rel) or {}
+    placeholder = snap.placeholders.get(rel) or {}
+    opaque = not placeholder.get("alpha")
+
+    def srcset(fmt: str) -> str:
+        return ", ".join(f"{url_for('static', filename=path)} {w}w" for w, path in entry.get(fmt, []))
+
+    return MappingProxyType({
+        "src": static_url(rel),
+        "webp_srcset": srcset("webp"),
+        "avif_srcset": srcset("avif"),
+        "width": entry.get("width") or placeholder.get("width", 0),
+        "height": entry.get("height") or placeholder.get("height", 0),
+        "color": placeholder.get("color", "") if opaque else "",
+        "lqip": placeholder.get("lqip", "") if opaque else "",
+    })
+
+
+# ----------------------------- Catalog PDF -----------------------------
+
+CATALOG_PDF_DPI = 150  # page size = image pixels at this resolution
+
+
+def catalog_pdf_pages(catalog: Catalog, slug: str = "") -> List[Path]:
+    """Gallery page images of one product, or of every product in catalog order."""
+    base = APP_DIR / "static" / "img" / "catalog"
+    galleries = ASSET_INDEX.snapshot().catalog
+    slugs = [slug] if slug else [p.slug for p in catalog.products]
+    return [base / s / n for s in slugs for n in galleries.get(s, ())]
+
+
+def _pdf_page_image(path: Path) -> tuple:
+    """(jpeg bytes, width, height, colorspace) — baseline/progressive RGB or gray JPEGs are embedded as-is."""
+    from PIL import Image  # type: ignore
+
+    with Image.open(path) as im:
+        if im.format == "JPEG" and im.mode in ("RGB", "L"):
+            return path.read_bytes(), im.width, im.height, "DeviceRGB" if im.mode == "RGB" else "DeviceGray"
+        im = im.convert("RGB")
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=85)
+        return buf.getvalue(), im.width, im.height, "DeviceRGB"
+
+
+def write_image_pdf(paths: List[Path], out, title: str = "") -> None:
+    """Write a PDF with one full-page image per file to the binary stream ``out``.
+
+    JPEG data is embedded directly (DCTDecode), so pages keep their quality and only one
+    image is held in memory at a time; Pillow only reads headers (or converts non-JPEGs).
+    """
+    offsets: List[int] = []
+    pos = 0
+
+    def emit(data: bytes) -> None:
+        nonlocal pos
+        out.write(data)
+        pos += len(data)
+
+    def obj(num: int, body: bytes, stream: bytes = b"") -> None:
+        offsets.append(pos)
+        emit(f"{num} 0 obj\n".encode() + body)
+        if stream:
+            emit(b"\nstream\n" + stream + b"\nendstream")
+        emit(b"\nendobj\n")
+
+    n = len(paths)
+    # 1 catalog, 2 pages, 3 info; then per page: page, image, content.
+    kids = " ".join(f"{4 + 3 * i} 0 R" for i in range(n))
+    emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode())
+    ascii_title = unicodedata.normalize("NFKD", title.replace("ł", "l").replace("Ł", "L")).encode("ascii", "ignore")
+    safe_title = re.sub(rb"[()\\]", b"", ascii_title)
+    obj(3, b"<< /Title (" + safe_title + b") /Producer (X-Estetik) >>")
+    for i, path in enumerate(paths):
+        data, w, h, colorspace = _pdf_page_image(path)
+        pw, ph = w * 72 / CATALOG_PDF_DPI, h * 72 / CATALOG_PDF_DPI
+        page, image, content = 4 + 3 * i, 5 + 3 * i, 6 + 3 * i
+        obj(page, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {pw:.2f} {ph:.2f}] "
+            f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {content} 0 R >>"
+        ).encode())
+        obj(image, (
+            f"<< /Type /XObject /Subtype /Image /Width {w} /Height {h} /ColorSpace /{colorspace} "
+            f"/BitsPerComponent 8 /Filter /DCTDecode /Length {len(data)} >>"
+        ).encode(), data)
+        draw = f"q {pw:.2f} 0 0 {ph:.2f} 0 0 cm /Im0 Do Q".encode()
+        obj(content, f"<< /Length {len(draw)} >>".encode(), draw)
+
+    xref = pos
+    emit(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+    emit("".join(f"{off:010d} 00000 n \n" for off in offsets).encode())
+    emit(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R /Info 3 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def catalog_pdf(app: Flask, name: str, paths: List[Path], title: str) -> Optional[Path]:
+    """Path of the cached PDF for ``paths``, building it when missing.
+
+    Files are content-addressed: PDF_CACHE_DIR/<name>.<hash>.pdf, where the hash covers
+    each page's path, mtime and size, so edited pages produce a new file and older
+    versions of the same name are removed. Builds are serialized per name with flock.
+    """
+    if not paths:
+        return None
+    h = hashlib.sha1(repr(CATALOG_PDF_DPI).encode())
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        h.update(f"{path.relative_to(APP_DIR).as_posix()}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    cache_dir = Path(app.config["PDF_CACHE_DIR"])
+    out = cache_dir / f"{name}.{h.hexdigest()[:16]}.pdf"
+    if out.exists():
+        return out
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(cache_dir / f".{name}.lock", "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            if not out.exists():
+                tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+                with tmp.open("wb") as f:
+                    write_image_pdf(paths, f, title=title)
+                os.replace(tmp, out)
+                for old in cache_dir.glob(f"{name}.*.pdf"):
+                    if old != out:
+                        old.unlink(missing_ok=True)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+    return out
+
+
+# ----------------------------- Page cache -----------------------------
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class PageCache:
+    """Bounded LRU cache of rendered pages with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: tuple, page: CachedPage) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+PAGE_CACHE = PageCache()
+
+
+# ----------------------------- Response compression -----------------------------
+
+COMPRESSIBLE_MIMETYPES = {"text/html", "application/json"}
+# Compressed bodies of ETag-ed responses (cached pages), keyed by (etag, level).
+COMPRESSED_PAGES = PageCache()
+
+
+def gzip_stream(chunks, level: int):
+    """Gzip a streamed body, flushing after every chunk so rows reach the client as produced."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if chunk:
+            yield z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+    yield z.flush()
+
+
+def compress_response(resp: Response, level: int, min_bytes: int) -> Response:
+    """Gzip an HTML/JSON response in place when the client accepts it.
+
+    Bodies under ``min_bytes`` are left as-is; streamed bodies are always compressed.
+    A strong ETag becomes weak (the bytes differ from the identity representation, but
+    If-None-Match still matches), and compressed cached pages are reused by ETag.
+    """
+    if level <= 0 or resp.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return resp
+    resp.vary.add("Accept-Encoding")
+    if request.accept_encodings.quality("gzip") <= 0 or "no-transform" in (resp.headers.get("Cache-Control") or ""):
+        return resp
+    etag, weak = resp.get_etag()
+    if resp.status_code == 304:
+        if etag and not weak:
+            resp.set_etag(etag, weak=True)
+        return resp
+    if resp.status_code < 200 or resp.status_code in (204, 206) or "Content-Encoding" in resp.headers or resp.direct_passthrough:
+        return resp
+
+    if resp.is_streamed:
+        resp.response = gzip_stream(resp.response, level)
+        resp.headers.pop("Content-Length", None)
+    else:
+        body = resp.get_data()
+        if len(body) < min_bytes:
+            return resp
+        cached = COMPRESSED_PAGES.get((etag, level)) if etag else None
+        if cached is None:
+            cached = CachedPage(body=gzip.compress(body, compresslevel=level, mtime=0), etag=etag or "", mimetype=resp.mimetype)
+            if etag:
+                COMPRESSED_PAGES.put((etag, level), cached)
+        resp.set_data(cached.body)
+    resp.headers["Content-Encoding"] = "gzip"
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+# ----------------------------- Views -----------------------------
+
+def resolve_static_video(video_base: str) -> str:
+    """Resolve a video URL from static/video by base name (stem), extension-agnostic.
+
+    - Matches the base name (stem) case-insensitively.
+    - Accepts .mp4/.mov/.m4v/.webm (any extension case), preferring mp4 then mov.
+    - Normalizes “fancy” dashes/spaces (e.g. U+2011) to survive Windows Explorer names.
+    - Returns the real filename so the URL matches the filesystem exactly.
+    """
+    if not video_base:
         return ""
 
-    if best_fp is None:
+    filename = ASSET_INDEX.snapshot().videos.get(normalize_asset_name(video_base))
+    if not filename:
         return ""
+    return static_url(f"video/{filename}")
 
-    return url_for("static", filename=f"video/{best_fp.name}")
+
+_FILTER_ZL_RE = re.compile(r"^(\d{1,9})(?:[,.](\d{1,2}))?$")
+
+
+def listing_filters(args) -> Dict:
+    """render_products_list() keyword arguments from ?sort=&min=&max=&rental=1 (prices in zł)."""
+    def zl(name: str) -> Optional[int]:
+        # Plain decimals only: float() would also accept "inf", "nan" and "1e400".
+        m = _FILTER_ZL_RE.match((args.get(name) or "").strip().replace(" ", ""))
+        if not m:
+            return None
+        return int(m.group(1)) * 100 + int((m.group(2) or "").ljust(2, "0"))
+
+    sort = (args.get("sort") or "").strip()
+    return {
+        "sort": sort if sort in LISTING_SORTS else "",
+        "price_min": zl("min"),
+        "price_max": zl("max"),
+        "rental_only": parse_bool(args.get("rental") or ""),
+    }
+
+
+def format_filter_zl(grosze: Optional[int]) -> str:
+    """Price filter echoed back into the form; always parses again with _FILTER_ZL_RE.
+
+    Dot separator: the inputs are type="number", which drops values written with a comma.
+    """
+    if grosze is None:
+        return ""
+    return f"{grosze // 100}" + (f".{grosze % 100:02d}" if grosze % 100 else "")
 
 
-def render_products_list(category: str, prods: List[Product]):
-    meta = CATEGORY_META.get(category, {})
+def render_products_list(category: str, sort: str = "", price_min: Optional[int] = None,
+                         price_max: Optional[int] = None, rental_only: bool = False):
+    catalog = get_catalog()
+    meta = catalog.category_meta.get(category, {})
+    prods = select_listing(catalog, category, sort, price_min, price_max, rental_only)
     return render_template(
         "products_list.html",
         page_title=f"{meta.get('label', category)} — X‑Estetik",
         page_heading=meta.get("label", category),
         page_description=meta.get("description", ""),
-        products=[to_view(p) for p in prods],
+        products=[product_view(p) for p in prods],
         grid_classes=meta.get("grid_classes", "grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4"),
         img_class=meta.get("img_class", "h-56"),
         section_px=meta.get("section_px", "px-4"),
         card_round=meta.get("card_round", "rounded-3xl"),
+        listing={
+            "sort": sort,
+            "min": format_filter_zl(price_min),
+            "max": format_filter_zl(price_max),
+            "rental": rental_only,
+            "filtered": bool(sort or price_min is not None or price_max is not None or rental_only),
+            "has_rental": bool(catalog.price_index.get(category) and catalog.price_index[category].rental),
+        },
     )
 
 
 def to_view(p: Product) -> Dict:
-    category_meta = CATEGORY_META.get(p.category, {})
+    """Build the template view-model for a product (listing card + detail page).
 
-    photo_base = PRODUCT_PHOTO_BASE.get(p.slug, "")
-    thumb_fallback = url_for("static", filename=f"img/thumbs/{p.slug}.jpg")
-    thumb = resolve_static_photo(photo_base) or thumb_fallback
+    Needs an app/request context (url_for). Use product_view() on request paths;
+    it returns the cached, frozen result of this function.
+    """
+    catalog = get_catalog()
+    category_meta = catalog.category_meta.get(p.category, {})
+
+    photo_base = catalog.photo_base.get(p.slug, "")
+    photo_file = ASSET_INDEX.snapshot().photos.get(normalize_asset_name(photo_base)) if photo_base else None
+    thumb_rel = f"photos/{photo_file}" if photo_file else f"img/thumbs/{p.slug}.jpg"
+    thumb_sources = image_sources(thumb_rel)
+    thumb = thumb_sources["src"]
+
+    gallery_images = list_gallery_sources(p.slug)
+    gallery = [img["src"] for img in gallery_images]
+    hero_sources = gallery_images[0] if gallery_images and not photo_base else thumb_sources
+    hero = hero_sources["src"]
+
+    # Effects (before/after) — visible for selected devices
+    effects_folder = (p.effects_folder or "").strip()
+    effects_url = (p.effects_url or "").strip()
+    effects_dir = effects_folder or p.slug
+    effects_images = list_effect_sources(effects_dir)
+    # Optional fallback: if mapping uses a custom folder but it's empty
+    if not effects_images and effects_folder and effects_folder != p.slug:
+        effects_images = list_effect_sources(p.slug)
 
     return {
         "slug": p.slug,
@@ -1312,24 +2583,111 @@ def to_view(p: Product) -> Dict:
         "rental": p.rental,
         "badge": p.badge,
         "thumb": thumb,
+        "thumb_sources": thumb_sources,
         "photo_base": photo_base,
         "effects_folder": p.effects_folder,
         "effects_url": p.effects_url,
+
+        # Detail page
+        "back_label": category_meta.get("label", "Lista"),
+        "back_url": url_for(category_meta.get("route", "index")),
+        "hero": hero,
+        "hero_sources": hero_sources,
+        "gallery": gallery,
+        "gallery_images": gallery_images,
+        "effects_enabled": bool(effects_folder or effects_url),
+        "effects_images": effects_images,
+        "effects_dir": effects_dir,
     }
 
 
-def list_gallery_images(slug: str) -> List[str]:
-    folder = APP_DIR / "static" / "img" / "catalog" / slug
-    if not folder.exists():
-        return []
-    imgs = sorted([p for p in folder.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"}])
-    return [url_for("static", filename=f"img/catalog/{slug}/{p.name}") for p in imgs]
+def freeze_view(view: Dict) -> Mapping:
+    """Return a read-only copy of a view dict (lists become tuples)."""
+    return MappingProxyType({k: tuple(v) if isinstance(v, list) else v for k, v in view.items()})
+
+
+class FrozenJSONProvider(DefaultJSONProvider):
+    """``|tojson`` / jsonify for frozen view-models (MappingProxyType is not a dict)."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, MappingProxyType):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+
+class VersionedMemo:
+    """Values computed once per key (catalog/config/asset versions); a new key drops them all.
+
+    Used for the request-invariant template context, so inject_globals() costs a key
+    comparison and a dict lookup per render.
+    """
+
+    def __init__(self):
+        self._key: Optional[tuple] = None
+        self._values: Dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, name, build):
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    self._values = {}
+                    self._key = key
+        values = self._values
+        try:
+            return values[name]
+        except KeyError:
+            value = values[name] = build()
+            return value
+
+
+CONTEXT_MEMO = VersionedMemo()
+
+
+class ProductViewCache:
+    """Frozen view-models for every product, rebuilt when the catalog or static assets change.
+
+    Keyed by (catalog version, asset index version, static fingerprint version, script root)
+    so the hashed URLs baked into the views stay valid, also under a mount prefix.
+    """
+
+    def __init__(self):
+        self._entry: tuple = (None, MappingProxyType({}))  # (key, views), swapped as one object
+        self._lock = threading.Lock()
 
+    def views(self) -> Mapping[str, Mapping]:
+        catalog = get_catalog()
+        key = (catalog.version, ASSET_INDEX.version, STATIC_FINGERPRINTS.current_version(), request.script_root)
+        entry = self._entry
+        if entry[0] != key:
+            with self._lock:
+                entry = self._entry
+                if entry[0] != key:
+                    entry = self._entry = (key, MappingProxyType({p.slug: freeze_view(to_view(p)) for p in catalog.products}))
+        return entry[1]
 
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = (None, MappingProxyType({}))
 
 
-def list_effect_images(folder_name: str) -> List[str]:
-    """List before/after effect images from static/efekty/<folder_name>/.
+PRODUCT_VIEWS = ProductViewCache()
+
+
+def product_view(p: Product) -> Mapping:
+    view = PRODUCT_VIEWS.views().get(p.slug)
+    return view if view is not None else freeze_view(to_view(p))
+
+
+def list_gallery_sources(slug: str) -> List[Mapping]:
+    """Catalog page images of a product, as image_sources() mappings (srcsets, size, placeholder)."""
+    names = ASSET_INDEX.snapshot().catalog.get(slug, ())
+    return [image_sources(f"img/catalog/{slug}/{n}") for n in names]
+
+
+def list_effect_sources(folder_name: str) -> List[Mapping]:
+    """Before/after effect images from static/efekty/<folder_name>/, as image_sources() mappings.
 
     The folder is optional and must be a single path segment (no traversal).
     Supported formats: .jpg/.jpeg/.png/.webp
@@ -1342,18 +2700,99 @@ def list_effect_images(folder_name: str) -> List[str]:
     if "/" in folder_name or "\\" in folder_name or ".." in folder_name:
         return []
 
-    folder = APP_DIR / "static" / "efekty" / folder_name
-    if not folder.exists():
-        return []
+    names = ASSET_INDEX.snapshot().effects.get(folder_name, ())
+    return [image_sources(f"efekty/{folder_name}/{n}") for n in names]
+
+
+# ----------------------------- Product search -----------------------------
+
+# Dashes from pasted names (X‑Levage uses U+2011) fold to '-'; ł has no decomposition;
+# trademark-style symbols become spaces (NFKD would turn "Frax™" into "fraxtm").
+_SEARCH_FOLD = str.maketrans({
+    **{ch: "-" for ch in "\u2010\u2011\u2012\u2013\u2014\u2212\uFE58\uFE63\uFF0D"},
+    **{ch: " " for ch in "\u2122\u00AE\u00A9\u2120\u2117\u00A0"},
+    "ł": "l", "Ł": "L",
+})
+_SEARCH_WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+# Field weights: a hit in the name outranks one in the tag, the summary or the bullets
+# (a token scores the weight of the best field it appears in).
+SEARCH_FIELD_WEIGHTS = (("name", 8.0), ("tag", 4.0), ("short", 2.0), ("bullets", 1.0))
 
-    imgs = sorted(
-        [p for p in folder.iterdir() if p.is_file() and p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"}]
-    )
-    return [url_for("static", filename=f"efekty/{folder_name}/{p.name}") for p in imgs]
 
-def first_gallery_image(slug: str) -> str:
-    imgs = list_gallery_images(slug)
-    return imgs[0] if imgs else ""
+def fold_search_text(text: str) -> str:
+    """Lowercase without Polish diacritics and with ASCII dashes ("Łódź X‑Levage" -> "lodz x-levage")."""
+    text = unicodedata.normalize("NFKD", (text or "").translate(_SEARCH_FOLD))
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def search_tokens(text: str) -> List[str]:
+    """Folded words; hyphenated words also yield their parts and the joined form.
+
+    "X‑Levage" -> ["x", "levage", "xlevage"], so "levage", "x-lev" and "xlevage" all match.
+    """
+    tokens: List[str] = []
+    for word in _SEARCH_WORD_RE.findall(fold_search_text(text)):
+        if "-" in word:
+            parts = word.split("-")
+            tokens += parts
+            tokens.append("".join(parts))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class ProductSearchIndex:
+    """Inverted index over a catalog's products: folded token -> {product position: weight}.
+
+    The vocabulary is sorted, so every query token also matches the indexed tokens it is a
+    prefix of (typeahead); prefix-only matches score half. All query tokens must match.
+    Built once per catalog version (see product_search_index()).
+    """
+
+    def __init__(self, products: tuple):
+        self.products = products
+        postings: Dict[str, Dict[int, float]] = {}
+        for i, p in enumerate(products):
+            for name, weight in SEARCH_FIELD_WEIGHTS:
+                value = getattr(p, name)
+                for token in set(search_tokens(" ".join(value) if isinstance(value, list) else value)):
+                    row = postings.setdefault(token, {})
+                    # Best field only: repeating a term in the summary must not beat having it in the name.
+                    row[i] = max(row.get(i, 0.0), weight)
+        self.vocab = sorted(postings)
+        self.postings = postings
+
+    def _matches(self, token: str) -> Dict[int, float]:
+        found: Dict[int, float] = {}
+        for j in range(bisect_left(self.vocab, token), len(self.vocab)):
+            term = self.vocab[j]
+            if not term.startswith(token):
+                break
+            factor = 1.0 if term == token else 0.5
+            for i, weight in self.postings[term].items():
+                found[i] = max(found.get(i, 0.0), weight * factor)
+        return found
+
+    def search(self, query: str, limit: int = 10, category: str = "") -> List[tuple]:
+        """(Product, score) pairs, best first; ties keep catalog order."""
+        scores: Optional[Dict[int, float]] = None
+        for token in dict.fromkeys(search_tokens(query)):
+            found = self._matches(token)
+            scores = found if scores is None else {i: scores[i] + w for i, w in found.items() if i in scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        hits = [(self.products[i], score) for i, score in ranked if not category or self.products[i].category == category]
+        return hits[:limit]
+
+
+SEARCH_INDEXES = VersionedMemo()
+
+
+def product_search_index(catalog: Catalog) -> ProductSearchIndex:
+    return SEARCH_INDEXES.get((catalog.version,), "products", lambda: ProductSearchIndex(catalog.products))
 
 
 # ----------------------------- Content -----------------------------
@@ -1554,12 +2993,120 @@ def policy_content(app: Flask) -> Dict[str, tuple]:
 
 # ----------------------------- Storage (SQLite) -----------------------------
 
-def get_db(app: Flask) -> sqlite3.Connection:
-    conn = sqlite3.connect(app.config["DB_PATH"])
+class DBStats:
+    """Process-wide counters for connection opens and write-lock waits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.open_seconds = 0.0
+        self.write_locks = 0
+        self.lock_wait_seconds = 0.0
+        self.lock_wait_max = 0.0
+        self.lock_timeouts = 0
+
+    def record_open(self, seconds: float) -> None:
+        with self._lock:
+            self.opens += 1
+            self.open_seconds += seconds
+
+    def record_lock_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.write_locks += 1
+            self.lock_wait_seconds += seconds
+            self.lock_wait_max = max(self.lock_wait_max, seconds)
+
+    def record_lock_timeout(self) -> None:
+        with self._lock:
+            self.lock_timeouts += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "opens": self.opens,
+                "open_ms_total": round(self.open_seconds * 1000, 3),
+                "write_locks": self.write_locks,
+                "lock_wait_ms_total": round(self.lock_wait_seconds * 1000, 3),
+                "lock_wait_ms_max": round(self.lock_wait_max * 1000, 3),
+                "lock_timeouts": self.lock_timeouts,
+            }
+
+
+DB_STATS = DBStats()
+_DB_LOCAL = threading.local()
+# Connections inherited from a parent process are never used nor closed in the child.
+_DB_INHERITED: List[sqlite3.Connection] = []
+
+
+def open_db(app: Flask) -> sqlite3.Connection:
+    """Open a tuned connection: WAL, synchronous=NORMAL, busy timeout, statement cache."""
+    started = time.perf_counter()
+    busy_ms = int(app.config.get("DB_BUSY_TIMEOUT_MS") or 5000)
+    conn = sqlite3.connect(
+        app.config["DB_PATH"],
+        timeout=busy_ms / 1000,
+        cached_statements=int(app.config.get("DB_STATEMENT_CACHE") or 256),
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={busy_ms}")
+    DB_STATS.record_open(time.perf_counter() - started)
+    return conn
+
+
+def get_db(app: Flask) -> sqlite3.Connection:
+    """Return this thread's connection to DB_PATH, opening it on first use.
+
+    Connections are reused for the lifetime of the worker thread; ``with get_db(app) as conn``
+    commits (or rolls back) but does not close. After a fork the child opens its own.
+    """
+    pid = os.getpid()
+    if getattr(_DB_LOCAL, "pid", None) != pid:
+        _DB_INHERITED.extend(getattr(_DB_LOCAL, "conns", {}).values())
+        _DB_LOCAL.pid = pid
+        _DB_LOCAL.conns = {}
+
+    path = app.config["DB_PATH"]
+    conn = _DB_LOCAL.conns.get(path)
+    if conn is None:
+        conn = _DB_LOCAL.conns[path] = open_db(app)
     return conn
 
 
+def close_db(app: Flask) -> None:
+    """Close this thread's connection to DB_PATH (the next get_db() reopens it)."""
+    conns = getattr(_DB_LOCAL, "conns", None)
+    if conns and getattr(_DB_LOCAL, "pid", None) == os.getpid():
+        conn = conns.pop(app.config["DB_PATH"], None)
+        if conn is not None:
+            conn.close()
+
+
+@contextmanager
+def db_write(app: Flask):
+    """Write transaction (BEGIN IMMEDIATE) on this thread's connection.
+
+    The time spent acquiring the write lock is recorded in DB_STATS.
+    """
+    conn = get_db(app)
+    if conn.in_transaction:
+        conn.commit()
+    started = time.perf_counter()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+    except sqlite3.OperationalError:
+        DB_STATS.record_lock_timeout()
+        raise
+    DB_STATS.record_lock_wait(time.perf_counter() - started)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
 def init_db(app: Flask) -> None:
     db_path = Path(app.config["DB_PATH"])
     db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -1577,12 +3124,63 @@ def init_db(app: Flask) -> None:
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lead_outbox (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              lead_id INTEGER NOT NULL REFERENCES leads(id),
+              kind TEXT NOT NULL,
+              status TEXT NOT NULL DEFAULT 'pending',
+              attempts INTEGER NOT NULL DEFAULT 0,
+              next_attempt_at REAL NOT NULL,
+              last_error TEXT,
+              created_at TEXT NOT NULL,
+              updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lead_outbox_due ON lead_outbox (status, next_attempt_at)"
+        )
+        # Position of each archived lead / e-mail inside the segmented archives.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS archive_index (
+              kind TEXT NOT NULL,
+              record_id INTEGER NOT NULL,
+              segment TEXT NOT NULL,
+              offset INTEGER NOT NULL,
+              length INTEGER NOT NULL,
+              PRIMARY KEY (kind, record_id)
+            )
+            """
+        )
+        # Admin list order (keyset pagination walks this index).
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_leads_created ON leads (created_at DESC, id DESC)"
+        )
         conn.commit()
 
+    app.config["LEADS_FTS"] = init_leads_fts(app)
+
 
 def save_lead(app: Flask, name: str, email: str, phone: str, message: str, path: str) -> tuple[int, str]:
     created_at = datetime.utcnow().isoformat(timespec="seconds")
-    with get_db(app) as conn:
+    digest = float(app.config.get("MAIL_DIGEST_SECONDS") or 0)
+    with db_write(app) as conn:
+        now = time.time()
+        email_due = now
+        if digest > 0:
+            # Digest mode: the first lead opens a window of MAIL_DIGEST_SECONDS; later leads join
+            # it (same due time), so the outbox claims and sends them together as one digest.
+            row = conn.execute(
+                """
+                SELECT MIN(next_attempt_at) AS t FROM lead_outbox
+                WHERE kind = 'email' AND status = 'pending' AND attempts = 0 AND next_attempt_at > ?
+                """,
+                (now,),
+            ).fetchone()
+            email_due = row["t"] if row["t"] is not None else now + digest
         cur = conn.execute(
             """
             INSERT INTO leads (created_at, name, email, phone, message, source_path)
@@ -1591,43 +3189,802 @@ def save_lead(app: Flask, name: str, email: str, phone: str, message: str, path:
             (created_at, name, email, phone, message, path),
         )
         lead_id = int(cur.lastrowid)
-        conn.commit()
+        conn.executemany(
+            """
+            INSERT INTO lead_outbox (lead_id, kind, status, attempts, next_attempt_at, created_at, updated_at)
+            VALUES (?, ?, 'pending', 0, ?, ?, ?)
+            """,
+            [(lead_id, kind, email_due if kind == "email" else now, created_at, created_at) for kind in OUTBOX_KINDS],
+        )
+    LEAD_COUNTS.invalidate()
     return lead_id, created_at
 
 
-# ----------------------------- Assets (QR) -----------------------------
+# ----------------------------- Lead search (FTS5) -----------------------------
+
+# unicode61 with remove_diacritics folds ą/ć/ę/ń/ó/ś/ź/ż, but not ł (no decomposition),
+# so ł/Ł are folded explicitly both when indexing (triggers) and when querying.
+def _fts_fold_sql(expr: str) -> str:
+    return f"replace(replace(coalesce({expr}, ''), 'ł', 'l'), 'Ł', 'L')"
+
+
+def _fts_phone_sql(expr: str) -> str:
+    # Original text plus digits-only variants (full and last 9 digits, i.e. without +48),
+    # so "518151" matches "+48 518 151 673".
+    digits = f"replace(replace(replace(replace(replace(coalesce({expr}, ''), ' ', ''), '-', ''), '+', ''), '(', ''), ')', '')"
+    return f"coalesce({expr}, '') || ' ' || {digits} || ' ' || substr({digits}, -9)"
+
+
+def _fts_values_sql(row: str) -> str:
+    return ", ".join([
+        f"{row}.id",
+        _fts_fold_sql(f"{row}.name"),
+        _fts_fold_sql(f"{row}.email"),
+        _fts_phone_sql(f"{row}.phone"),
+        _fts_fold_sql(f"{row}.message"),
+    ])
+
+
+def init_leads_fts(app: Flask) -> bool:
+    """Create the leads_fts index + sync triggers and backfill it. Returns False without FTS5."""
+    try:
+        with db_write(app) as conn:
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5(
+                  name, email, phone, message,
+                  tokenize = 'unicode61 remove_diacritics 2'
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS leads_fts_ai AFTER INSERT ON leads BEGIN
+                  INSERT INTO leads_fts (rowid, name, email, phone, message) VALUES ({_fts_values_sql("new")});
+                END
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS leads_fts_ad AFTER DELETE ON leads BEGIN
+                  DELETE FROM leads_fts WHERE rowid = old.id;
+                END
+                """
+            )
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS leads_fts_au AFTER UPDATE ON leads BEGIN
+                  DELETE FROM leads_fts WHERE rowid = old.id;
+                  INSERT INTO leads_fts (rowid, name, email, phone, message) VALUES ({_fts_values_sql("new")});
+                END
+                """
+            )
+            # Backfill rows written before the index existed (or by a build without FTS5).
+            missing = conn.execute(
+                "SELECT (SELECT COUNT(1) FROM leads) != (SELECT COUNT(1) FROM leads_fts) AS m"
+            ).fetchone()["m"]
+            if missing:
+                conn.execute("DELETE FROM leads_fts")
+                conn.execute(
+                    f"INSERT INTO leads_fts (rowid, name, email, phone, message) SELECT {_fts_values_sql('leads')} FROM leads"
+                )
+        return True
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e).lower():
+            raise
+        app.logger.warning("SQLite without FTS5 — admin search falls back to LIKE")
+        return False
+
 
-def ensure_qr_codes(app: Flask) -> None:
-    """Generate QR codes for social links.
+def leads_fts_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    q = q.replace("ł", "l").replace("Ł", "L")
+    return " ".join(f'"{t}"*' for t in re.findall(r"\w+", q))
 
-    We overwrite QR files on startup so they always match the configured URLs.
+
+# ----------------------------- Lead listing (admin) -----------------------------
+
+class LeadCountCache:
+    """Short-lived cache of COUNT(1) results per search query.
+
+    Writes in this process invalidate it immediately; writes from other workers show
+    up after ``ttl`` seconds.
     """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, q: str, compute) -> int:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(q)
+            if hit is not None and now - hit[1] < self.ttl:
+                return hit[0]
+        value = int(compute())
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[q] = (value, now)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+LEAD_COUNTS = LeadCountCache()
+
+
+def encode_lead_cursor(key, lead_id: int) -> str:
+    return f"{key!r}|{lead_id}" if isinstance(key, float) else f"{key}|{lead_id}"
+
+
+def decode_lead_cursor(raw: str, numeric: bool) -> Optional[tuple]:
+    key, sep, lead_id = (raw or "").rpartition("|")
+    if not sep or not lead_id.isdigit():
+        return None
+    if numeric:
+        try:
+            return float(key), int(lead_id)
+        except ValueError:
+            return None
+    return key, int(lead_id)
+
+
+def fetch_leads_page(app: Flask, q: str = "", after: str = "", before: str = "", per_page: int = 50) -> Dict:
+    """One page of leads using keyset (cursor) pagination — no OFFSET, so every page costs the same.
+
+    Without a query (or without FTS5) leads are ordered newest first by (created_at, id);
+    with a full-text query by (bm25 rank, id). ``after``/``before`` are cursors returned
+    as ``next_cursor``/``prev_cursor`` by a previous call.
+    """
+    fts_q = leads_fts_query(q) if q and app.config.get("LEADS_FTS") else ""
+    if fts_q:
+        sql = "SELECT leads.*, leads_fts.rank AS _key FROM leads_fts JOIN leads ON leads.id = leads_fts.rowid"
+        where, params = ["leads_fts MATCH ?"], [fts_q]
+        key_expr, key_desc = "leads_fts.rank", False
+        count_sql = "SELECT COUNT(1) AS c FROM leads_fts WHERE leads_fts MATCH ?"
+    else:
+        sql = "SELECT leads.*, leads.created_at AS _key FROM leads"
+        where, params = [], []
+        if q:
+            ql = f"%{q.lower()}%"
+            where.append("(lower(name) LIKE ? OR lower(email) LIKE ? OR lower(phone) LIKE ? OR lower(message) LIKE ?)")
+            params += [ql, ql, ql, ql]
+        key_expr, key_desc = "leads.created_at", True
+        count_sql = "SELECT COUNT(1) AS c FROM leads" + (" WHERE " + where[0] if where else "")
+    count_params = list(params)
+
+    # Display order is (key ASC|DESC, id DESC); paging backwards walks it reversed.
+    backward = bool(before) and not after
+    cursor = decode_lead_cursor(before if backward else after, numeric=bool(fts_q))
+    if cursor is not None:
+        key_op = (">" if key_desc else "<") if backward else ("<" if key_desc else ">")
+        id_op = ">" if backward else "<"
+        where.append(f"({key_expr} {key_op} ? OR ({key_expr} = ? AND leads.id {id_op} ?))")
+        params += [cursor[0], cursor[0], cursor[1]]
+
+    key_dir = "DESC" if key_desc != backward else "ASC"
+    id_dir = "ASC" if backward else "DESC"
+    sql += (" WHERE " + " AND ".join(where) if where else "") + f" ORDER BY {key_expr} {key_dir}, leads.id {id_dir} LIMIT ?"
+    params.append(per_page + 1)
+
+    with get_db(app) as conn:
+        rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+        total = LEAD_COUNTS.get(q, lambda: conn.execute(count_sql, count_params).fetchone()["c"])
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+    has_next = more if not backward else True
+    has_prev = (cursor is not None) if not backward else more
+
+    next_cursor = encode_lead_cursor(rows[-1]["_key"], int(rows[-1]["id"])) if rows and has_next else ""
+    prev_cursor = encode_lead_cursor(rows[0]["_key"], int(rows[0]["id"])) if rows and has_prev else ""
+    for r in rows:
+        r.pop("_key", None)
+
+    return {
+        "leads": rows,
+        "total": total,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
+EXPORT_COLUMNS = ("id", "created_at", "name", "email", "phone", "message", "source_path")
+_CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value) -> str:
+    """CSV cell text; values Excel would read as a formula get a leading apostrophe."""
+    if value is None:
+        return ""
+    text = str(value)
+    return "'" + text if text.startswith(_CSV_FORMULA_PREFIXES) else text
+
+
+def iter_leads_export(app: Flask, fmt: str, q: str = "", date_from: str = "", date_to: str = "", chunk_rows: int = 200):
+    """Yield the leads table as CSV or JSONL text chunks, oldest first.
+
+    Rows are pulled lazily from a dedicated connection (fetchmany), so memory stays constant
+    and the first bytes go out before the whole table has been read. ``date_from``/``date_to``
+    are inclusive YYYY-MM-DD bounds on created_at (UTC).
+    """
+    import csv
+
+    where, params = [], []
+    fts_q = leads_fts_query(q) if q and app.config.get("LEADS_FTS") else ""
+    if fts_q:
+        where.append("id IN (SELECT rowid FROM leads_fts WHERE leads_fts MATCH ?)")
+        params.append(fts_q)
+    elif q:
+        ql = f"%{q.lower()}%"
+        where.append("(lower(name) LIKE ? OR lower(email) LIKE ? OR lower(phone) LIKE ? OR lower(message) LIKE ?)")
+        params += [ql, ql, ql, ql]
+    if date_from:
+        where.append("created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        # created_at is ISO 8601 ('2026-02-24T15:05:33'), so '<date>U' sorts after every time of that day.
+        where.append("created_at < ?")
+        params.append(date_to + "U")
+
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM leads"
+    sql += (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY created_at, id"
+
+    conn = open_db(app)
     try:
-        import qrcode  # type: ignore
-    except Exception:
-        return
+        cur = conn.execute(sql, params)
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == "csv" else None
+        if writer is not None:
+            buf.write("\ufeff")  # BOM: Excel opens Polish characters correctly
+            writer.writerow(EXPORT_COLUMNS)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            for row in rows:
+                if writer is not None:
+                    writer.writerow([csv_cell(row[c]) for c in EXPORT_COLUMNS])
+                else:
+                    buf.write(json.dumps({c: row[c] for c in EXPORT_COLUMNS}, ensure_ascii=False) + "\n")
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+    finally:
+        conn.close()
+
+
+# ----------------------------- Lead outbox -----------------------------
+
+# Jobs queued for every lead: disk archive first, then the e-mail notification.
+OUTBOX_KINDS = ("archive", "email")
+
+
+def load_leads(app: Flask, lead_ids: List[int]) -> Dict[int, Dict]:
+    if not lead_ids:
+        return {}
+    marks = ",".join("?" * len(lead_ids))
+    with get_db(app) as conn:
+        rows = conn.execute(f"SELECT * FROM leads WHERE id IN ({marks})", list(lead_ids)).fetchall()
+    return {int(r["id"]): dict(r) for r in rows}
+
+
+def lead_fields(lead: Dict) -> Dict:
+    """Keyword arguments for archive_lead_to_disk / build_lead_email from a leads row."""
+    return dict(
+        lead_id=lead["id"],
+        created_at=lead["created_at"],
+        name=lead["name"],
+        email=lead["email"],
+        phone=lead.get("phone") or "",
+        message=lead["message"],
+        source_path=lead.get("source_path") or "",
+    )
 
-    qr_dir = APP_DIR / "static" / "img" / "qr"
-    qr_dir.mkdir(parents=True, exist_ok=True)
 
-    items = [
-        ("instagram.png", app.config.get("INSTAGRAM_URL", "")),
-        ("facebook.png", app.config.get("FACEBOOK_URL", "")),
-        ("facebook_epilacja.png", app.config.get("FACEBOOK_EPILACJA_URL", "")),
-        ("facebook_estetik_frax.png", app.config.get("FACEBOOK_ESTETIK_FRAX_URL", "")),
-        ("facebook_tulowy_erbo.png", app.config.get("FACEBOOK_TULOWY_ERBO_URL", "")),
-    ]
+class LeadOutbox:
+    """Background delivery of queued lead jobs (lead_outbox table).
 
-    for filename, url in items:
-        if not url:
-            continue
-        out = qr_dir / filename
+    Due jobs are claimed in batches with BEGIN IMMEDIATE, so several gunicorn workers can
+    poll the same database safely. A claimed job is leased for ``lease`` seconds; if its
+    worker dies the job becomes due again. A batch carries at most one outgoing message
+    (one e-mail, or one digest), so it finishes well within the lease, and the lease
+    expiry doubles as a claim token: results are written only while the job still holds
+    the lease it was claimed with. Failures are retried with exponential backoff and moved
+    to the 'dead' state after OUTBOX_MAX_ATTEMPTS.
+
+    E-mail jobs of one batch go out over the shared SMTP session; with MAIL_DIGEST_SECONDS
+    the leads of one window share a due time (see save_lead) and are merged into a single
+    digest message.
+    """
+
+    lease = 120.0
+    batch_size = 50
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def ensure_running(self, app: Flask) -> None:
+        if not app.config.get("OUTBOX_WORKER"):
+            return
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._wake = threading.Event()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(app,), name="lead-outbox", daemon=True)
+            self._thread.start()
+
+    def notify(self, app: Flask) -> None:
+        self.ensure_running(app)
+        self._wake.set()
+
+    def _run(self, app: Flask) -> None:
+        poll = float(app.config.get("OUTBOX_POLL_INTERVAL") or 15)
+        timeout = poll
+        while True:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            try:
+                self.process_due(app)
+                SMTP_SESSION.close_if_idle(app)
+                next_due = self.next_due_at(app)
+                timeout = poll if next_due is None else min(poll, max(0.05, next_due - time.time()))
+            except Exception:
+                app.logger.exception("lead outbox: processing failed")
+                timeout = poll
+
+    def next_due_at(self, app: Flask) -> Optional[float]:
+        with get_db(app) as conn:
+            row = conn.execute(
+                "SELECT MIN(next_attempt_at) AS t FROM lead_outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()
+        return row["t"] if row and row["t"] is not None else None
+
+    def _claim(self, app: Flask, digest: bool) -> tuple:
+        """(due jobs, lease expiry): every due non-e-mail job, plus one e-mail job, or all due
+        e-mail jobs in digest mode (they become a single message)."""
+        now = time.time()
+        lease = now + self.lease
+        with db_write(app) as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM lead_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id LIMIT ?
+                """,
+                (now, self.batch_size),
+            ).fetchall()
+            emails = [r for r in rows if r["kind"] == "email"]
+            keep = {r["id"] for r in (emails if digest else emails[:1])}
+            rows = [r for r in rows if r["kind"] != "email" or r["id"] in keep]
+            if rows:
+                conn.executemany(
+                    """
+                    UPDATE lead_outbox
+                    SET status = 'sending', attempts = attempts + 1, next_attempt_at = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    [(lease, datetime.utcnow().isoformat(timespec="seconds"), r["id"]) for r in rows],
+                )
+        return rows, lease
+
+    def _finish(self, app: Flask, job_id: int, lease: float, status: str, next_attempt_at: float, error: str = "") -> None:
+        # No-op when the lease ran out and another worker re-claimed the job meanwhile.
+        with db_write(app) as conn:
+            cur = conn.execute(
+                """
+                UPDATE lead_outbox SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+                WHERE id = ? AND status = 'sending' AND next_attempt_at = ?
+                """,
+                (status, next_attempt_at, error or None, datetime.utcnow().isoformat(timespec="seconds"), job_id, lease),
+            )
+        if not cur.rowcount:
+            app.logger.warning("lead outbox: job %s lost its lease before finishing (%s)", job_id, status)
+
+    def _failed(self, app: Flask, job: sqlite3.Row, lease: float, e: Exception) -> None:
+        max_attempts = int(app.config.get("OUTBOX_MAX_ATTEMPTS") or 8)
+        base = float(app.config.get("OUTBOX_RETRY_BASE") or 30)
+        cap = float(app.config.get("OUTBOX_RETRY_MAX") or 3600)
+
+        attempts = int(job["attempts"]) + 1
+        error = f"{type(e).__name__}: {e}"[:500]
+        if attempts >= max_attempts:
+            self._finish(app, job["id"], lease, "dead", time.time(), error)
+            app.logger.error("lead outbox: job %s (%s) dead after %s attempts: %s", job["id"], job["kind"], attempts, error)
+        else:
+            delay = min(cap, base * (2 ** (attempts - 1)))
+            self._finish(app, job["id"], lease, "pending", time.time() + delay, error)
+
+    def process_due(self, app: Flask) -> int:
+        """Deliver every job that is due now. Returns the number of jobs processed."""
+        digest = float(app.config.get("MAIL_DIGEST_SECONDS") or 0) > 0
+        done = 0
+        while True:
+            jobs, lease = self._claim(app, digest)
+            if not jobs:
+                return done
+            done += len(jobs)
+            leads = load_leads(app, sorted({int(j["lead_id"]) for j in jobs}))
+
+            emails: List[tuple] = []
+            for job in jobs:
+                lead = leads.get(int(job["lead_id"]))
+                if lead is None:
+                    self._failed(app, job, lease, LookupError(f"lead {job['lead_id']} not found"))
+                elif job["kind"] == "archive":
+                    try:
+                        archive_lead_to_disk(app, **lead_fields(lead))
+                    except Exception as e:
+                        self._failed(app, job, lease, e)
+                        continue
+                    self._finish(app, job["id"], lease, "sent", time.time())
+                elif job["kind"] == "email":
+                    emails.append((job, lead))
+                else:
+                    self._failed(app, job, lease, ValueError(f"unknown outbox job kind: {job['kind']}"))
+
+            # _claim() hands out one e-mail, or one digest's worth: a single message per batch.
+            if not emails:
+                continue
+            try:
+                msg = build_lead_digest_email(app, [lead for _job, lead in emails])
+                if msg is not None:
+                    smtp_send_message(app, msg)
+            except Exception as e:
+                for job, _lead in emails:
+                    self._failed(app, job, lease, e)
+                continue
+            if msg is not None:
+                archive_eml(app, msg, [int(lead["id"]) for _job, lead in emails])
+            for job, _lead in emails:
+                self._finish(app, job["id"], lease, "sent", time.time())
+
+
+LEAD_OUTBOX = LeadOutbox()
+
+
+# ----------------------------- Assets (QR) -----------------------------
+
+QR_DIR = "img/qr"  # relative to static/
+QR_SIZE = 512
+# QR image name -> config key holding the encoded URL.
+QR_CODES = {
+    "instagram": "INSTAGRAM_URL",
+    "facebook": "FACEBOOK_URL",
+    "facebook_epilacja": "FACEBOOK_EPILACJA_URL",
+    "facebook_estetik_frax": "FACEBOOK_ESTETIK_FRAX_URL",
+    "facebook_tulowy_erbo": "FACEBOOK_TULOWY_ERBO_URL",
+}
+HASHED_QR_RE = re.compile(r"^[\w-]+\.[0-9a-f]{12}\.(png|svg)$")
+
+
+class QRCodeCache:
+    """QR images stored as static/img/qr/<name>.<hash>.<fmt>, where <hash> covers the URL and
+    render settings; a file is generated only when missing (on first use, not at startup).
+
+    Writes go through a temp file + rename, so concurrent workers at worst render the same
+    image twice. Without ``qrcode`` (or on error) the committed static/img/qr/<name>.png is used.
+    """
+
+    def __init__(self, static_dir: Path):
+        self.static_dir = static_dir
+        self._resolved: Dict[tuple, str] = {}  # (name, url, fmt) -> filename relative to static/
+        self._lock = threading.Lock()
+
+    def filename(self, name: str, url: str, fmt: str = "png") -> str:
+        fmt = "svg" if fmt == "svg" else "png"
+        key = (name, url, fmt)
+        cached = self._resolved.get(key)
+        if cached:
+            return cached
+
+        digest = hashlib.sha1(repr((url, fmt, QR_SIZE)).encode()).hexdigest()[:12]
+        rel = f"{QR_DIR}/{name}.{digest}.{fmt}"
+        out = self.static_dir / rel
+        if not out.exists():
+            with self._lock:
+                if not out.exists() and not self._generate(out, url, fmt):
+                    rel = f"{QR_DIR}/{name}.png"
+        self._resolved[key] = rel
+        return rel
+
+    def _generate(self, out: Path, url: str, fmt: str) -> bool:
         try:
-            img = qrcode.make(url)
-            img = img.resize((512, 512))
-            img.save(out)
+            import qrcode  # type: ignore
+
+            if fmt == "svg":
+                from qrcode.image.svg import SvgPathImage  # type: ignore
+
+                data = qrcode.make(url, image_factory=SvgPathImage).to_string()
+            else:
+                buf = io.BytesIO()
+                qrcode.make(url).resize((QR_SIZE, QR_SIZE)).save(buf, "PNG")
+                data = buf.getvalue()
+            out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, out)
         except Exception:
-            continue
+            return False
+
+        # Drop images rendered for a previous URL of the same name.
+        stem = out.name.split(".", 1)[0]
+        for old in out.parent.glob(f"{stem}.*.{fmt}"):
+            if old != out and HASHED_QR_RE.match(old.name):
+                old.unlink(missing_ok=True)
+        return True
+
+
+QR_CACHE = QRCodeCache(APP_DIR / "static")
+
+
+def qr_url(app: Flask, name: str) -> str:
+    """Static URL of the QR image for QR_CODES[name] (generated on first use).
+
+    The file name is already content-addressed, so no ``?v=`` is appended (social.html prints it).
+    """
+    url = (app.config.get(QR_CODES[name]) or "").strip()
+    if not url:
+        return ""
+    return url_for("static", filename=QR_CACHE.filename(name, url, app.config.get("QR_FORMAT", "png")))
+
+
+# ----------------------------- Remote images (R2 mirror) -----------------------------
+
+REMOTE_THUMB_WIDTHS = (320, 640, 960, 1280)
+REMOTE_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+REMOTE_FAILURE_TTL = 30.0  # seconds a failed fetch is remembered before the URL is tried again
+
+
+class RemoteImageError(Exception):
+    pass
+
+
+class RemoteImageCache:
+    """On-disk mirror of remote (R2) images plus WebP thumbnails derived from them.
+
+    Layout under ``root``: ``orig/<sha1(url)><ext>`` and ``thumb/<sha1(url)>.<width>.webp``.
+    Each object is downloaded once; every hit bumps the file's atime, and when the
+    directory grows past ``max_bytes`` the least recently used files are deleted.
+    Fetches for the same URL are serialized, so a burst of requests downloads it once,
+    and a failed fetch is remembered for ``failure_ttl`` seconds: meanwhile requests for
+    that URL fail immediately instead of each waiting for the timeout again.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 200 * 1024 * 1024, timeout: float = 10.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.fetches = 0
+        self.evictions = 0
+        self.failure_ttl = REMOTE_FAILURE_TTL
+        self._failed: Dict[str, tuple] = {}  # url -> (monotonic retry-after time, error text)
+        self._size: Optional[int] = None  # bytes on disk, counted on first write
+        self._fetching: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._fetching.setdefault(key, threading.Lock())
+
+    def _hit(self, path: Path) -> bool:
+        # Recency lives in atime (set explicitly, so noatime mounts work too); mtime stays
+        # put and keeps the ETag / Last-Modified of served files stable.
+        try:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except OSError:
+            return False
+        self.hits += 1
+        return True
+
+    def _check_failed(self, url: str) -> None:
+        failed = self._failed.get(url)
+        if failed is not None:
+            if time.monotonic() < failed[0]:
+                raise RemoteImageError(f"{url}: {failed[1]} (cached failure)")
+            self._failed.pop(url, None)
+
+    def _fail(self, url: str, error: str) -> RemoteImageError:
+        self._failed[url] = (time.monotonic() + self.failure_ttl, error)
+        return RemoteImageError(f"{url}: {error}")
+
+    def original(self, url: str) -> Path:
+        """Local copy of ``url``, downloading it on first use (RemoteImageError on failure)."""
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        ext = Path(url.split("?", 1)[0]).suffix.lower()
+        path = self.root / "orig" / f"{digest}{ext if ext in REMOTE_IMAGE_EXTS else ''}"
+        if self._hit(path):
+            return path
+        self._check_failed(url)
+        with self._key_lock(digest):
+            if self._hit(path):
+                return path
+            # Requests queued behind a failed fetch give up here rather than retrying it.
+            self._check_failed(url)
+            from urllib.request import Request, urlopen
+
+            try:
+                with urlopen(Request(url, headers={"User-Agent": "x-estetik-image-cache"}), timeout=self.timeout) as resp:
+                    data = resp.read(self.max_bytes + 1)
+            except OSError as e:
+                raise self._fail(url, str(e)) from e
+            if len(data) > self.max_bytes:
+                raise self._fail(url, "larger than the cache")
+            self.fetches += 1
+            self._store(path, data)
+        return path
+
+    def thumbnail(self, url: str, width: int) -> Path:
+        """WebP copy of ``url`` at most ``width`` px wide, rendered from the local original."""
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        path = self.root / "thumb" / f"{digest}.{width}.webp"
+        if self._hit(path):
+            return path
+        src = self.original(url)
+        with self._key_lock(f"{digest}.{width}"):
+            if self._hit(path):
+                return path
+            from PIL import Image, ImageOps  # type: ignore
+
+            try:
+                with Image.open(src) as im:
+                    im.draft("RGB", (width, width * 4))
+                    im = ImageOps.exif_transpose(im)
+                    im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+                    if im.width > width:
+                        im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+                    buf = io.BytesIO()
+                    im.save(buf, "WEBP", quality=80, method=4)
+            except Exception as e:
+                raise RemoteImageError(f"{url}: {e}") from e
+            self._store(path, buf.getvalue())
+        return path
+
+    def _store(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(f.stat().st_size for f in self._files())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+
+    def _files(self) -> List[Path]:
+        return [f for f in self.root.glob("*/*") if f.is_file() and not f.name.endswith(".tmp")]
+
+    def _evict(self, keep: Path) -> None:
+        # Other workers share the directory, so re-measure it rather than trust our counter.
+        entries = []
+        for f in self._files():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_atime_ns, st.st_size, f))
+        entries.sort()
+        total = sum(size for _m, size, _f in entries)
+        target = self.max_bytes * 0.9  # free some headroom so the next write does not evict again
+        for _atime, size, f in entries:
+            if total <= target:
+                break
+            if f == keep:
+                continue
+            f.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits, "fetches": self.fetches, "evictions": self.evictions, "bytes": self._size,
+            "failing": sum(1 for until, _e in list(self._failed.values()) if until > time.monotonic()),
+        }
+
+
+REMOTE_IMAGES = RemoteImageCache(APP_DIR / "instance" / "remote_images")
+
+
+def strony_www_files(app: Flask) -> List[str]:
+    return [s.strip() for s in (app.config.get("STRONY_WWW_FILES") or "").split(",") if s.strip()]
+
+
+def strony_www_image(name: str, width: int = 0) -> str:
+    """URL of a portfolio image served through the local mirror (``width`` 0 = original)."""
+    return url_for("strony_www_image_file", name=name, w=width or None)
+
+
+def strony_www_sources(name: str, width: int) -> Mapping:
+    """``src`` at ``width`` plus a ``srcset`` of the thumbnail widths up to twice that."""
+    widths = [w for w in REMOTE_THUMB_WIDTHS if w <= width * 2] or [REMOTE_THUMB_WIDTHS[0]]
+    return MappingProxyType({
+        "src": strony_www_image(name, min(widths, key=lambda w: abs(w - width))),
+        "srcset": ", ".join(f"{strony_www_image(name, w)} {w}w" for w in widths),
+    })
+
+
+# ----------------------------- Bootstrap -----------------------------
+
+# Bump whenever init_db() / init_leads_fts() gain new DDL, so existing databases get it.
+SCHEMA_VERSION = 1
+
+
+def bootstrap(app: Flask) -> None:
+    """One-time setup shared by all workers: data directories and the SQLite schema.
+
+    Runs under an flock on ``<DB_PATH>.bootstrap.lock``. The first process writes
+    ``<DB_PATH>.bootstrap`` (schema version + FTS5 availability); later workers and restarts
+    find it and skip the DDL. Under ``gunicorn --preload`` it runs once, in the master,
+    and the master's connection is closed again so no SQLite handle crosses the fork.
+    """
+    (APP_DIR / "instance").mkdir(parents=True, exist_ok=True)
+    db_path = Path(app.config["DB_PATH"])
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    stamp = db_path.with_name(db_path.name + ".bootstrap")
+
+    with open(db_path.with_name(db_path.name + ".bootstrap.lock"), "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            try:
+                state = json.loads(stamp.read_text(encoding="utf-8")) if db_path.exists() else {}
+            except (OSError, ValueError):
+                state = {}
+            if state.get("schema") == SCHEMA_VERSION:
+                app.config["LEADS_FTS"] = bool(state.get("fts"))
+                return
+
+            init_db(app)
+            tmp = stamp.with_name(f"{stamp.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"schema": SCHEMA_VERSION, "fts": app.config["LEADS_FTS"]}), encoding="utf-8")
+            os.replace(tmp, stamp)
+        finally:
+            close_db(app)
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _after_fork_in_child() -> None:
+    """Reset per-process state in a forked worker (gunicorn, with or without preload_app).
+
+    Locks may have been held by another thread at fork time, the SMTP socket belongs to the
+    parent and its threads do not exist here. DB connections are already per-pid (get_db);
+    the outbox thread is restarted by the next request (LEAD_OUTBOX.ensure_running).
+    """
+    global _ARCHIVES_LOCK
+    for obj in (SMTP_SESSION, ASSET_INDEX, STATIC_FINGERPRINTS, PAGE_CACHE, COMPRESSED_PAGES,
+                PRODUCT_VIEWS, CONTEXT_MEMO, SEARCH_INDEXES, CATALOG_STORE, DB_STATS, LEAD_COUNTS, LEAD_OUTBOX, QR_CACHE,
+                REMOTE_IMAGES):
+        obj._lock = threading.Lock()
+    REMOTE_IMAGES._fetching = {}
+    SMTP_SESSION._server = None
+    LEAD_OUTBOX._wake = threading.Event()
+    LEAD_OUTBOX._thread = None
+    _ARCHIVES_LOCK = threading.Lock()
+    _ARCHIVES.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 # ----------------------------- Run -----------------------------
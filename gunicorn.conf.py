@@ -0,0 +1,22 @@
+"""Gunicorn settings (picked up automatically by `gunicorn app:app` from this directory).
+
+With preload_app the app is imported once in the master: bootstrap (directories, SQLite
+schema), the static asset index and content hashes are built there and shared with the
+workers copy-on-write. Per-process state is reset after fork by app._after_fork_in_child.
+"""
+import gc
+import os
+
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    # Objects created while preloading are never collected; freezing them keeps the GC
+    # from touching (and un-sharing) their pages in every worker.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info("worker %s forked (preload=%s)", worker.pid, preload_app)
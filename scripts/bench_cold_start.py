@@ -0,0 +1,86 @@
+"""Cold-start benchmark: import time per module, create_app() phases and first render.
+
+Runs the app in fresh interpreters (like an instance woken up on Render) against a
+temporary DATA_DIR and exits with status 1 when import + first homepage render exceeds
+the budget.
+
+    python scripts/bench_cold_start.py [--budget-ms 1500] [--runs 3] [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_RENDER = """
+import json, time
+t0 = time.perf_counter()
+import app as m
+with m.app.test_client() as c:
+    status = c.get("/").status_code
+print(json.dumps({"status": status, "total_ms": (time.perf_counter() - t0) * 1000, "report": m.STARTUP.report()}))
+"""
+
+
+def run(code, env, *args):
+    return subprocess.run([sys.executable, *args, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_times(env, top):
+    """(module, cumulative ms) of the slowest top-level imports, from -X importtime."""
+    stderr = run("import app", env, "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        # One leading space, then two more per nesting level; keep app and its direct imports.
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((name.strip(), int(cumulative_us) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("COLD_START_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, DATA_DIR=data_dir, OUTBOX_WORKER="0", PYTHONDONTWRITEBYTECODE="1")
+        run("import app", env)  # first boot: schema + bootstrap stamp, like a deploy
+
+        print("Slowest imports (cumulative ms):")
+        for name, ms in import_times(env, args.top):
+            print(f"  {ms:8.1f}  {name}")
+
+        results = [json.loads(run(FIRST_RENDER, env).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+
+    best = min(results, key=lambda r: r["total_ms"])
+    print("\nStartup phases (best run, ms):")
+    for lap in best["report"]["laps"]:
+        print(f"  {lap['ms']:8.1f}  {lap['phase']}")
+    first = best["report"]["first_request"] or {}
+    print(f"  {first.get('ms', 0):8.1f}  first request ({first.get('endpoint', '?')})")
+
+    totals = sorted(r["total_ms"] for r in results)
+    print(f"\nimport + first render: best {totals[0]:.1f} ms, median {totals[len(totals) // 2]:.1f} ms, budget {args.budget_ms:.0f} ms")
+    if any(r["status"] != 200 for r in results):
+        print("FAIL: homepage did not return 200")
+        return 1
+    if totals[len(totals) // 2] > args.budget_ms:
+        print("FAIL: cold start over budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
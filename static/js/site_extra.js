@@ -1,29 +1,76 @@
 (function () {
   // ---------------- Search filter on product list pages ----------------
+  // Ranked, diacritics-insensitive matching comes from /api/search (all categories);
+  // matches from other categories are listed below the grid. Falls back to a local
+  // substring filter when the API is unreachable.
   const input = document.getElementById('searchInput');
   const grid = document.getElementById('productsGrid');
   const count = document.getElementById('resultsCount');
   const noResults = document.getElementById('noResults');
+  const elsewhere = document.getElementById('searchElsewhere');
+  const elsewhereList = document.getElementById('searchElsewhereList');
+  let searchSeq = 0;
+  let searchTimer = null;
 
-  function filter() {
-    if (!input || !grid) return;
-    const q = (input.value || '').trim().toLowerCase();
-    const cards = Array.from(grid.querySelectorAll('.product-card'));
+  function showCards(isVisible) {
+    const cards = Array.from(grid.querySelectorAll('[data-slug]'));
     let shown = 0;
-
     cards.forEach((c) => {
-      const name = (c.getAttribute('data-name') || '').toLowerCase();
-      const ok = !q || name.includes(q);
+      const ok = isVisible(c);
       c.classList.toggle('hidden', !ok);
       if (ok) shown += 1;
     });
-
     if (count) count.textContent = String(shown);
     if (noResults) noResults.classList.toggle('hidden', shown !== 0);
   }
 
+  function showElsewhere(results) {
+    if (!elsewhere || !elsewhereList) return;
+    elsewhereList.textContent = '';
+    results.forEach((r) => {
+      const a = document.createElement('a');
+      a.href = r.url;
+      a.className = 'pill-link';
+      a.textContent = r.name + ' · ' + r.category_label;
+      elsewhereList.appendChild(a);
+    });
+    elsewhere.classList.toggle('hidden', results.length === 0);
+  }
+
+  function localFilter(q) {
+    const needle = q.toLowerCase();
+    showCards((c) => !needle || (c.getAttribute('data-name') || '').includes(needle));
+    showElsewhere([]);
+  }
+
+  function filter() {
+    if (!input || !grid) return;
+    const q = (input.value || '').trim();
+    const url = input.getAttribute('data-search-url');
+    if (!q || !url || !window.fetch) {
+      localFilter(q);
+      return;
+    }
+    const seq = ++searchSeq;
+    fetch(url + '?limit=50&q=' + encodeURIComponent(q), { headers: { Accept: 'application/json' } })
+      .then((r) => (r.ok ? r.json() : Promise.reject(r.status)))
+      .then((data) => {
+        if (seq !== searchSeq) return; // a newer query is in flight
+        const inGrid = new Set(Array.from(grid.querySelectorAll('[data-slug]')).map((c) => c.getAttribute('data-slug')));
+        const hits = new Set(data.results.map((r) => r.slug));
+        showCards((c) => hits.has(c.getAttribute('data-slug')));
+        showElsewhere(data.results.filter((r) => !inGrid.has(r.slug)));
+      })
+      .catch(() => {
+        if (seq === searchSeq) localFilter(q);
+      });
+  }
+
   if (input && grid) {
-    input.addEventListener('input', filter);
+    input.addEventListener('input', () => {
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(filter, 120);
+    });
     filter();
   }
 